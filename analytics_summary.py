@@ -0,0 +1,361 @@
+"""
+Summary table untuk endpoint analytics, dijaga incremental oleh handler
+create / update / delete / bulk di routers/transaction.py (di transaksi DB
+yang sama).
+
+Data yang masuk tanpa lewat router (import CSV, seed, edit manual) tidak
+tercatat; jalankan rebuild untuk menghitung ulang dari tabel transaction.
+Saat startup (dan init_db) summary di-rebuild otomatis kalau masih kosong
+sementara tabel transaction sudah berisi (lihat ensure_built):
+
+    python -m app.analytics_summary            # rebuild + cek
+    python -m app.analytics_summary --check    # cek saja
+"""
+import argparse
+import sys
+
+from sqlalchemy import and_, bindparam, case, delete, exists, func, insert, or_, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from . import models
+from .date_utils import year_month
+from .response_cache import bump_version
+
+
+def _key(value):
+    return value if value is not None else ""
+
+
+def unkey(column):
+    """Kebalikan _key saat membaca summary: "" -> NULL, sama seperti tabel transaction."""
+    return func.nullif(column, "")
+
+
+def snapshot(tx):
+    """
+    Nilai kolom transaksi yang dipakai summary (diambil sebelum di-update /
+    delete). `tx` object Transaction, atau dict nilai kolom (bulk insert).
+    """
+    get = tx.get if isinstance(tx, dict) else (lambda name: getattr(tx, name))
+    return {
+        "item_id": get("item_id"),
+        "item_name": get("item_name"),
+        "category_name": get("category_name"),
+        "qty_in": get("qty_in") or 0,
+        "qty_out": get("qty_out") or 0,
+        "restock_flag": get("restock_flag"),
+        "tx_date": get("tx_date"),
+        "stock_awal": get("stock_awal"),
+        "stock_current": get("stock_current"),
+    }
+
+
+# ---------------------------------------------------------
+# Upsert "tambah ke nilai yang ada" per dialect
+# ---------------------------------------------------------
+def _least(dialect, a, b):
+    # SQLite: min() dengan 2 argumen = scalar; NULL di salah satu sisi diabaikan
+    fn = func.min if dialect == "sqlite" else func.least
+    return fn(func.coalesce(a, b), func.coalesce(b, a))
+
+
+def _greatest(dialect, a, b):
+    fn = func.max if dialect == "sqlite" else func.greatest
+    return fn(func.coalesce(a, b), func.coalesce(b, a))
+
+
+def _upsert(db, model, rows, keys, deltas, mins=(), maxs=()):
+    """
+    Upsert `rows` (list dict, satu per key) dalam satu executemany. Kolom
+    `deltas` ditambahkan ke nilai yang ada, `mins` / `maxs` digabung dengan
+    least / greatest.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql", "mysql"):
+        if dialect == "mysql":
+            stmt = mysql.insert(table)
+            new = stmt.inserted
+        else:
+            stmt = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+            new = stmt.excluded
+
+        set_ = {col: table.c[col] + new[col] for col in deltas}
+        set_.update({col: _least(dialect, table.c[col], new[col]) for col in mins})
+        set_.update({col: _greatest(dialect, table.c[col], new[col]) for col in maxs})
+
+        if dialect == "mysql":
+            stmt = stmt.on_duplicate_key_update(**set_)
+        else:
+            stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+        db.execute(stmt, rows)
+        return
+
+    # dialect lain: UPDATE dulu, INSERT kalau belum ada barisnya
+    where = and_(*(table.c[col] == bindparam(f"k_{col}") for col in keys))
+    set_ = {col: table.c[col] + bindparam(f"v_{col}") for col in deltas}
+    set_.update({col: _least(dialect, table.c[col], bindparam(f"v_{col}")) for col in mins})
+    set_.update({col: _greatest(dialect, table.c[col], bindparam(f"v_{col}")) for col in maxs})
+    stmt = update(table).where(where).values(**set_)
+    for row in rows:
+        params = {(f"k_{col}" if col in keys else f"v_{col}"): value for col, value in row.items()}
+        if db.execute(stmt, params).rowcount == 0:
+            db.execute(insert(table), row)
+
+
+ITEM_DELTAS = ["row_count", "active_count", "total_in", "total_out"]
+CATEGORY_DELTAS = ["row_count", "total_in", "total_out", "restock_count"]
+
+
+def _add(totals, key, *deltas):
+    acc = totals.get(key)
+    if acc is None:
+        totals[key] = list(deltas)
+        return
+    for i, value in enumerate(deltas):
+        acc[i] += value
+
+
+def _merge(values, key, value, fn):
+    # min / max yang mengabaikan None (sama dengan _least / _greatest)
+    current = values.get(key)
+    values[key] = value if current is None else current if value is None else fn(current, value)
+
+
+def _apply(db, rows, sign):
+    """
+    Tambah (sign=+1) / kurangi (sign=-1) summary untuk `rows`. Delta dijumlah
+    per key di Python dulu, lalu satu upsert (executemany) per summary table.
+    """
+    items, categories, dates, months = {}, {}, {}, {}
+    min_awal, max_current, item_rows = {}, {}, {}
+
+    for row in rows:
+        qty_in, qty_out = row["qty_in"], row["qty_out"]
+        item_key = (_key(row["item_id"]), _key(row["item_name"]))
+        category = _key(row["category_name"])
+        item_rows.setdefault(item_key, row)
+
+        # urutan delta = ITEM_DELTAS / CATEGORY_DELTAS
+        _add(
+            items, item_key,
+            sign, sign if (qty_in > 0 or qty_out > 0) else 0, sign * qty_in, sign * qty_out,
+        )
+        _merge(min_awal, item_key, row["stock_awal"], min)
+        _merge(max_current, item_key, row["stock_current"], max)
+        _add(
+            categories, category,
+            sign, sign * qty_in, sign * qty_out, sign if row["restock_flag"] == "YES" else 0,
+        )
+
+        if row["tx_date"] is not None:
+            _add(dates, row["tx_date"], sign)
+            if qty_out > 0:
+                month_key = (item_key[0], category, row["tx_date"].year, row["tx_date"].month)
+                _add(months, month_key, sign * qty_out)
+
+    if sign > 0:
+        # min / max hanya bisa digabung saat insert; saat delete dihitung ulang
+        _upsert(
+            db, models.ItemSummary,
+            [
+                {"item_id": k[0], "item_name": k[1], **dict(zip(ITEM_DELTAS, d)),
+                 "min_stock_awal": min_awal[k], "max_stock_current": max_current[k]}
+                for k, d in items.items()
+            ],
+            ["item_id", "item_name"], ITEM_DELTAS,
+            mins=["min_stock_awal"], maxs=["max_stock_current"],
+        )
+    else:
+        _upsert(
+            db, models.ItemSummary,
+            [{"item_id": k[0], "item_name": k[1], **dict(zip(ITEM_DELTAS, d))} for k, d in items.items()],
+            ["item_id", "item_name"], ITEM_DELTAS,
+        )
+    _upsert(
+        db, models.CategorySummary,
+        [{"category_name": k, **dict(zip(CATEGORY_DELTAS, d))} for k, d in categories.items()],
+        ["category_name"], CATEGORY_DELTAS,
+    )
+    _upsert(
+        db, models.ActiveDateSummary,
+        [{"tx_date": k, "row_count": d[0]} for k, d in dates.items()],
+        ["tx_date"], ["row_count"],
+    )
+    _upsert(
+        db, models.MonthOutSummary,
+        [
+            {"item_id": k[0], "category_name": k[1], "year": k[2], "month": k[3], "total_out": d[0]}
+            for k, d in months.items()
+        ],
+        ["item_id", "category_name", "year", "month"], ["total_out"],
+    )
+
+    if sign < 0 and item_rows:
+        for item_key, row in item_rows.items():
+            _refresh_item_stock(db, row, item_key)
+        _drop_empty(db)
+
+
+def _refresh_item_stock(db, row, item_key):
+    tx = models.Transaction
+    item = models.ItemSummary
+    item_id, item_name = item_key
+
+    # min / max stok item dihitung ulang dari baris item itu saja (index Item ID)
+    item_filter = [
+        func.coalesce(tx.item_id, "") == item_id,
+        func.coalesce(tx.item_name, "") == item_name,
+    ]
+    if row["item_id"] is not None:
+        item_filter.append(tx.item_id == row["item_id"])
+    min_awal, max_current = db.execute(
+        select(func.min(tx.stock_awal), func.max(tx.stock_current)).where(*item_filter)
+    ).one()
+    db.execute(
+        update(item)
+        .where(item.item_id == item_id, item.item_name == item_name)
+        .values(min_stock_awal=min_awal, max_stock_current=max_current)
+    )
+
+
+def _drop_empty(db):
+    # baris summary yang sudah kosong dibuang
+    db.execute(delete(models.ItemSummary).where(models.ItemSummary.row_count <= 0))
+    db.execute(delete(models.CategorySummary).where(models.CategorySummary.row_count <= 0))
+    db.execute(delete(models.ActiveDateSummary).where(models.ActiveDateSummary.row_count <= 0))
+    db.execute(delete(models.MonthOutSummary).where(models.MonthOutSummary.total_out <= 0))
+
+
+# ---------------------------------------------------------
+# Dipanggil dari routers/transaction.py (setelah db.flush(), sebelum commit)
+# ---------------------------------------------------------
+def record_insert(db, row):
+    _apply(db, [row], +1)
+
+
+def record_delete(db, row):
+    _apply(db, [row], -1)
+
+
+def record_update(db, old_row, new_row):
+    record_many(db, [(old_row, new_row)])
+
+
+def record_many(db, changes):
+    """
+    Versi batch untuk bulk insert / upsert: `changes` = list (old_row, new_row),
+    old_row None untuk baris baru.
+    """
+    changes = [(old, new) for old, new in changes if old != new]
+    _apply(db, [old for old, _ in changes if old is not None], -1)
+    _apply(db, [new for _, new in changes], +1)
+
+
+# ---------------------------------------------------------
+# Rebuild & cek dari tabel transaction
+# ---------------------------------------------------------
+def _aggregates():
+    tx = models.Transaction
+    item_id = func.coalesce(tx.item_id, "")
+    item_name = func.coalesce(tx.item_name, "")
+    category = func.coalesce(tx.category_name, "")
+    year, month = year_month(tx.tx_date)
+
+    return {
+        models.ItemSummary: (
+            select(
+                item_id, item_name,
+                func.count(),
+                func.sum(case((or_(tx.qty_in > 0, tx.qty_out > 0), 1), else_=0)),
+                func.coalesce(func.sum(tx.qty_in), 0),
+                func.coalesce(func.sum(tx.qty_out), 0),
+                func.min(tx.stock_awal),
+                func.max(tx.stock_current),
+            ).group_by(item_id, item_name)
+        ),
+        models.CategorySummary: (
+            select(
+                category,
+                func.count(),
+                func.coalesce(func.sum(tx.qty_in), 0),
+                func.coalesce(func.sum(tx.qty_out), 0),
+                func.sum(case((tx.restock_flag == "YES", 1), else_=0)),
+            ).group_by(category)
+        ),
+        models.MonthOutSummary: (
+            select(item_id, category, year, month, func.sum(tx.qty_out))
+            .where(tx.qty_out > 0, tx.tx_date.isnot(None))
+            .group_by(item_id, category, year, month)
+        ),
+        models.ActiveDateSummary: (
+            select(tx.tx_date, func.count())
+            .where(tx.tx_date.isnot(None))
+            .group_by(tx.tx_date)
+        ),
+    }
+
+
+def rebuild(db):
+    """Kosongkan lalu isi ulang semua summary table dari tabel transaction."""
+    for model, stmt in _aggregates().items():
+        columns = [c.name for c in model.__table__.columns]
+        db.execute(delete(model))
+        db.execute(insert(model.__table__).from_select(columns, stmt))
+    # isi summary berubah -> response analytics yang di-cache ikut basi
+    bump_version(db)
+    db.commit()
+
+
+def ensure_built(db):
+    """
+    Rebuild kalau summary masih kosong padahal tabel transaction berisi, mis.
+    DB lama yang tabel summary-nya baru dibuat create_all. Tanpa ini endpoint
+    analytics menjawab [] / 0. Return True kalau rebuild dijalankan.
+    """
+    has_summary = db.execute(select(exists().select_from(models.ItemSummary))).scalar()
+    if has_summary:
+        return False
+    if not db.execute(select(exists().select_from(models.Transaction))).scalar():
+        return False
+    rebuild(db)
+    return True
+
+
+def check(db):
+    """Bandingkan summary table dengan hasil agregat dari tabel transaction."""
+    problems = []
+    for model, stmt in _aggregates().items():
+        expected = {tuple(r) for r in db.execute(stmt).all()}
+        actual = {tuple(r) for r in db.execute(select(*model.__table__.columns)).all()}
+        for r in sorted(expected - actual, key=repr):
+            problems.append(f"{model.__tablename__}: kurang / beda {r}")
+        for r in sorted(actual - expected, key=repr):
+            problems.append(f"{model.__tablename__}: lebih / beda {r}")
+    return problems
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="cek saja, tanpa rebuild")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if not args.check:
+            rebuild(db)
+            print("Summary table di-rebuild.")
+        problems = check(db)
+    finally:
+        db.close()
+
+    for p in problems:
+        print(p)
+    print("OK" if not problems else f"{len(problems)} perbedaan")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,82 @@
+"""
+Versi async dari router (mode DB_MODE=async, lihat config.py).
+
+Setiap endpoint sync yang punya parameter `db` dibungkus jadi `async def`
+dengan dependency get_async_db, lalu badan aslinya dijalankan lewat
+AsyncSession.run_sync. Query tetap satu sumber (kode router yang sama), tapi
+I/O database jadi non-blocking di event loop, tidak lagi memakai slot
+threadpool Starlette per request.
+
+Endpoint yang tidak bisa dibungkus begitu saja (mis. streaming yang terus
+membaca DB setelah handler selesai) menyediakan versi async sendiri lewat
+atribut `async_endpoint`.
+"""
+import inspect
+
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+
+from .database import get_async_db
+
+
+def _asyncify(endpoint):
+    override = getattr(endpoint, "async_endpoint", None)
+    if override is not None:
+        return override
+
+    signature = inspect.signature(endpoint)
+    if "db" not in signature.parameters:
+        return endpoint
+
+    params = [
+        p.replace(default=Depends(get_async_db)) if p.name == "db" else p
+        for p in signature.parameters.values()
+    ]
+
+    async def wrapper(**kwargs):
+        db = kwargs.pop("db")
+        return await db.run_sync(lambda session: endpoint(**kwargs, db=session))
+
+    wrapper.__signature__ = signature.replace(parameters=params)
+    wrapper.__name__ = endpoint.__name__
+    wrapper.__qualname__ = endpoint.__qualname__
+    wrapper.__doc__ = endpoint.__doc__
+    wrapper.__module__ = endpoint.__module__
+    return wrapper
+
+
+def asyncify_router(router: APIRouter) -> APIRouter:
+    """Salin `router` dengan semua endpoint ber-`db` diganti versi async."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+
+        async_router.add_api_route(
+            route.path,
+            _asyncify(route.endpoint),
+            methods=route.methods,
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            name=route.name,
+            operation_id=route.operation_id,
+            response_model_include=route.response_model_include,
+            response_model_exclude=route.response_model_exclude,
+            response_model_by_alias=route.response_model_by_alias,
+            response_model_exclude_unset=route.response_model_exclude_unset,
+            response_model_exclude_defaults=route.response_model_exclude_defaults,
+            response_model_exclude_none=route.response_model_exclude_none,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+            route_class_override=type(route),
+            openapi_extra=route.openapi_extra,
+        )
+    return async_router
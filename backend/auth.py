@@ -1,14 +1,27 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from backend.db import SessionLocal
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from backend.db import get_db
 from backend.models import User
 
 SECRET_KEY = "supersecretkey123"   # nanti bisa diganti
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# cache token yang sudah diverifikasi -> user
+AUTH_CACHE_SIZE = 1024
+# Invalidasi (user diubah / dihapus) hanya berlaku di proses yang melakukan
+# perubahan. Dengan beberapa worker uvicorn, worker lain masih menerima token
+# user itu sampai entry-nya kedaluwarsa, jadi TTL = batas jendela basi itu.
+AUTH_CACHE_TTL = 5   # detik, tapi tidak pernah melewati exp token
+
 security = HTTPBearer()
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -23,24 +36,158 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+# -----------------------------------
+# CACHE TOKEN -> USER
+# -----------------------------------
+class TokenCache:
+    """
+    LRU + TTL, key = sha256 token (token mentah tidak disimpan). Isinya nilai
+    kolom User, bukan objek ORM, supaya tiap request dapat salinan sendiri.
+    """
+
+    def __init__(self, max_entries=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # digest -> (expires_at, user_id, values)
+        self._by_user = {}              # user_id -> set digest
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= time.time():
+                self._remove(digest)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, digest, exp, values):
+        expires_at = min(time.time() + self.ttl, exp)
+        with self._lock:
+            self._remove(digest)
+            self._entries[digest] = (expires_at, values["id"], values)
+            self._by_user.setdefault(values["id"], set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        digests = self._by_user.get(entry[1])
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[entry[1]]
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for digest in list(self._by_user.get(user_id, ())):
+                self._remove(digest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
+# Event flush hanya mencatat user yang berubah di session.info; cache baru
+# dibuang setelah commit, supaya request lain tidak sempat mengisi ulang
+# cache dengan baris lama di antara flush dan commit. Hanya cache proses ini
+# yang dibuang; worker lain menunggu AUTH_CACHE_TTL.
+_PENDING_USERS = "auth_invalidate_users"
+_PENDING_CLEAR = "auth_invalidate_all"
+
 
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
+# user diubah / dihapus lewat ORM -> buang semua token miliknya
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        token_cache.invalidate_user(target.id)
+        return
+    session.info.setdefault(_PENDING_USERS, set()).add(target.id)
 
-        # Cek user di database
-        db = SessionLocal()
-        user = db.query(User).filter(User.username == username).first()
-        db.close()
 
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+# update/delete massal (query(User).update/delete) tidak tahu user mana -> kosongkan
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _invalidate_bulk(context):
+    if context.mapper.class_ is User:
+        context.session.info[_PENDING_CLEAR] = True
 
-        return user
 
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    user_ids = session.info.pop(_PENDING_USERS, ())
+    if session.info.pop(_PENDING_CLEAR, False):
+        token_cache.clear()
+        return
+    for user_id in user_ids:
+        token_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending(session, transaction):
+    # rollback transaksi terluar: perubahannya batal, cache tidak perlu dibuang
+    if transaction.parent is None:
+        session.info.pop(_PENDING_USERS, None)
+        session.info.pop(_PENDING_CLEAR, None)
+
+
+def _user_values(user: User) -> dict:
+    return {c.key: getattr(user, c.key) for c in User.__mapper__.column_attrs}
+
+
+def _cached_user(values: dict) -> User:
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+):
+    token = credentials.credentials
+    digest = TokenCache.digest(token)
+
+    values = token_cache.get(digest)
+    if values is not None:
+        return _cached_user(values)
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+    username: str = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    # Cek user di database (session yang sama dengan request)
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    values = _user_values(user)
+    token_cache.put(digest, payload.get("exp", float("inf")), values)
+    return _cached_user(values)
@@ -1,38 +1,62 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import extract, func
 from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend.models import Item, Transaction
 from backend.auth import get_current_user
-from datetime import datetime
-from collections import defaultdict
-import statistics
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+
+def _item_totals(db: Session):
+    """Total IN / OUT per item (semua item, termasuk yang belum punya transaksi) dalam satu query."""
+    return (
+        db.query(
+            Item.id,
+            Item.target_stock,
+            func.coalesce(func.sum(Transaction.qty_in), 0),
+            func.coalesce(func.sum(Transaction.qty_out), 0),
+        )
+        .outerjoin(Transaction, Transaction.item_id == Item.id)
+        .group_by(Item.id, Item.target_stock)
+        .order_by(Item.id)
+        .all()
+    )
+
 # -----------------------------------
 # FREQUENCY PER ITEM
 # -----------------------------------
 @router.get("/frequency")
 def frequency_per_item(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    result = defaultdict(int)
-    transactions = db.query(Transaction).all()
-    for trx in transactions:
-        result[trx.item_id] += 1
-    return [{"item_id": k, "transaction_count": v} for k, v in result.items()]
+    # urut kemunculan pertama, sama seperti hasil loop lama
+    rows = (
+        db.query(Transaction.item_id, func.count())
+        .group_by(Transaction.item_id)
+        .order_by(func.min(Transaction.id))
+        .all()
+    )
+    return [{"item_id": k, "transaction_count": v} for k, v in rows]
 
 # -----------------------------------
 # AVERAGE RESTOCK TIME (days)
 # -----------------------------------
 @router.get("/avg_restock_time")
 def avg_restock_time(db: Session = Depends(get_db), user=Depends(get_current_user)):
+    rows = (
+        db.query(Item.id, func.min(Transaction.date), func.max(Transaction.date), func.count(Transaction.date))
+        .join(Transaction, Transaction.item_id == Item.id)
+        .filter(Transaction.qty_in > 0)
+        .group_by(Item.id)
+        .having(func.count(Transaction.date) >= 2)
+        .order_by(Item.id)
+        .all()
+    )
     restock_times = {}
-    items = db.query(Item).all()
-    for item in items:
-        trx_in = sorted([trx.date for trx in item.transactions if trx.qty_in > 0])
-        if len(trx_in) < 2:
-            continue
-        intervals = [(trx_in[i] - trx_in[i-1]).days for i in range(1, len(trx_in))]
-        restock_times[item.id] = statistics.mean(intervals)
+    for item_id, first, last, n in rows:
+        # rata-rata selisih tanggal berurutan = (terakhir - pertama) / (n - 1);
+        # int kalau habis dibagi, seperti statistics.mean
+        days = (last - first).days
+        restock_times[item_id] = days // (n - 1) if days % (n - 1) == 0 else days / (n - 1)
     return [{"item_id": k, "avg_restock_days": v} for k, v in restock_times.items()]
 
 # -----------------------------------
@@ -40,13 +64,19 @@ def avg_restock_time(db: Session = Depends(get_db), user=Depends(get_current_use
 # -----------------------------------
 @router.get("/out_trend")
 def out_trend(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    trend = defaultdict(int)
-    transactions = db.query(Transaction).all()
-    for trx in transactions:
-        if trx.qty_out > 0:
-            key = (trx.item_id, trx.date.strftime("%Y-%m"))
-            trend[key] += trx.qty_out
-    return [{"item_id": k[0], "month": k[1], "qty_out": v} for k, v in trend.items()]
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    rows = (
+        db.query(Transaction.item_id, year, month, func.sum(Transaction.qty_out))
+        .filter(Transaction.qty_out > 0)
+        .group_by(Transaction.item_id, year, month)
+        .order_by(func.min(Transaction.id))
+        .all()
+    )
+    return [
+        {"item_id": item_id, "month": f"{int(y):04d}-{int(m):02d}", "qty_out": int(v)}
+        for item_id, y, m, v in rows
+    ]
 
 # -----------------------------------
 # TURNOVER RATIO PER ITEM
@@ -54,11 +84,8 @@ def out_trend(db: Session = Depends(get_db), user=Depends(get_current_user)):
 @router.get("/turnover_ratio")
 def turnover_ratio(db: Session = Depends(get_db), user=Depends(get_current_user)):
     ratio = {}
-    items = db.query(Item).all()
-    for item in items:
-        total_in = sum(trx.qty_in for trx in item.transactions)
-        total_out = sum(trx.qty_out for trx in item.transactions)
-        ratio[item.id] = total_out / total_in if total_in > 0 else None
+    for item_id, _, total_in, total_out in _item_totals(db):
+        ratio[item_id] = int(total_out) / int(total_in) if total_in > 0 else None
     return [{"item_id": k, "turnover_ratio": v} for k, v in ratio.items()]
 
 # -----------------------------------
@@ -67,10 +94,7 @@ def turnover_ratio(db: Session = Depends(get_db), user=Depends(get_current_user)
 @router.get("/predicted_restock")
 def predicted_restock(db: Session = Depends(get_db), user=Depends(get_current_user)):
     prediction = {}
-    items = db.query(Item).all()
-    for item in items:
-        total_out = sum(trx.qty_out for trx in item.transactions)
-        total_in = sum(trx.qty_in for trx in item.transactions)
-        predicted = max(item.target_stock - (total_in - total_out), 0)
-        prediction[item.id] = predicted
+    for item_id, target_stock, total_in, total_out in _item_totals(db):
+        predicted = max(target_stock - (int(total_in) - int(total_out)), 0)
+        prediction[item_id] = predicted
     return [{"item_id": k, "predicted_restock": v} for k, v in prediction.items()]
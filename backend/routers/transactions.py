@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from backend.db import get_db
 from backend import models, schemas
@@ -20,24 +21,38 @@ def create_transaction(
     user=Depends(get_current_user)
 ):
 
-    # cek item
-    item = db.query(models.Item).filter(models.Item.id == data.item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-
-    # stok sebelum
-    stock_before = item.stock
-
-    # update stok otomatis
-    if data.qty_in > 0:
-        item.stock += data.qty_in
-
-    if data.qty_out > 0:
-        if item.stock < data.qty_out:
-            raise HTTPException(status_code=400, detail="Stock not enough")
-        item.stock -= data.qty_out
+    # update stok dalam satu UPDATE bersyarat: cek + ubah terjadi atomik di DB,
+    # jadi request paralel untuk item yang sama tidak bisa oversell / saling timpa
+    # qty <= 0 tidak mengubah stok (sama seperti cabang `if qty > 0` sebelumnya)
+    qty_in = max(data.qty_in, 0)
+    qty_out = max(data.qty_out, 0)
+    delta = qty_in - qty_out
+    stock = func.coalesce(models.Item.stock, 0)
+    stmt = (
+        update(models.Item)
+        .where(models.Item.id == data.item_id, stock + qty_in >= qty_out)
+        .values(stock=stock + delta)
+        .execution_options(synchronize_session=False)
+    )
 
-    stock_after = item.stock
+    if db.get_bind().dialect.update_returning:
+        stock_after = db.execute(stmt.returning(models.Item.stock)).scalar()
+    else:
+        # MySQL tidak punya UPDATE ... RETURNING; baris sudah terkunci oleh
+        # UPDATE di atas, jadi SELECT ... FOR UPDATE membaca nilai kita sendiri
+        stock_after = None
+        if db.execute(stmt).rowcount:
+            stock_after = db.execute(
+                select(models.Item.stock).where(models.Item.id == data.item_id).with_for_update()
+            ).scalar()
+
+    if stock_after is None:
+        db.rollback()
+        if db.get(models.Item, data.item_id) is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        raise HTTPException(status_code=400, detail="Stock not enough")
+
+    stock_before = stock_after - delta
 
     trx = models.Transaction(
         item_id=data.item_id,
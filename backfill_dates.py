@@ -0,0 +1,92 @@
+"""
+Isi kolom "Tx Date" (DATE) dari kolom "Date" (string) untuk baris lama.
+
+Jalan per chunk (keyset di Transaction ID) dan commit tiap chunk, jadi kalau
+terputus tinggal dijalankan lagi: hanya baris yang Tx Date-nya masih NULL
+yang diproses.
+
+    python -m app.backfill_dates --chunk-size 5000
+"""
+import argparse
+
+from sqlalchemy import inspect, select, update
+
+from .database import engine, SessionLocal
+from . import models
+from .date_utils import parse_date_str
+
+
+def ensure_tx_date_column(bind=engine):
+    """
+    Tambah kolom Tx Date kalau tabel dibuat sebelum kolom ini ada, lalu buat
+    index model yang belum ada (termasuk index komposit untuk analytics).
+    """
+    table = models.Transaction.__table__
+    column = models.Transaction.tx_date.property.columns[0]
+    existing = {c["name"] for c in inspect(bind).get_columns(table.name)}
+
+    if column.name not in existing:
+        preparer = bind.dialect.identifier_preparer
+        ddl = "ALTER TABLE {} ADD COLUMN {} {}".format(
+            preparer.format_table(table),
+            preparer.format_column(column),
+            column.type.compile(dialect=bind.dialect),
+        )
+        with bind.begin() as conn:
+            conn.exec_driver_sql(ddl)
+
+    for index in table.indexes:
+        index.create(bind=bind, checkfirst=True)
+
+
+def backfill(session_factory=SessionLocal, chunk_size=5000):
+    tx = models.Transaction
+    total = 0
+    last_id = None
+
+    while True:
+        db = session_factory()
+        try:
+            stmt = (
+                select(tx.transaction_id, tx.date)
+                .where(tx.tx_date.is_(None), tx.date.isnot(None))
+                .order_by(tx.transaction_id)
+                .limit(chunk_size)
+            )
+            if last_id is not None:
+                stmt = stmt.where(tx.transaction_id > last_id)
+
+            rows = db.execute(stmt).all()
+            if not rows:
+                break
+
+            # banyak baris punya string tanggal yang sama -> parse sekali per string
+            parsed = {}
+            updates = []
+            for transaction_id, date_str in rows:
+                if date_str not in parsed:
+                    parsed[date_str] = parse_date_str(date_str)
+                if parsed[date_str] is not None:
+                    updates.append({"transaction_id": transaction_id, "tx_date": parsed[date_str]})
+
+            if updates:
+                db.execute(update(tx), updates)
+            db.commit()
+
+            total += len(updates)
+            last_id = rows[-1].transaction_id
+            print(f"{total} baris terisi (sampai {last_id})")
+        finally:
+            db.close()
+
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    ensure_tx_date_column()
+    n = backfill(chunk_size=args.chunk_size)
+    print(f"Backfill selesai: {n} baris")
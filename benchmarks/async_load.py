@@ -0,0 +1,124 @@
+"""
+Load test mode sync vs async (DB_MODE=async + aiosqlite).
+
+Untuk tiap mode, server uvicorn dijalankan sebagai proses terpisah di atas
+file SQLite yang sama, lalu diserang request GET /transactions/ (filter +
+cursor acak, tidak kena cache analytics) di beberapa level concurrency.
+
+Jalankan dari root repo:
+    python -m benchmarks.async_load --rows 200000 --requests 2000 --concurrency 10 50 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import ROOT, seed_transactions, sqlite_engine
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, db_path, port):
+    env = dict(
+        os.environ,
+        DB_MODE=mode,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{db_path}",
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{ROOT.name}.main:app",
+         "--port", str(port), "--log-level", "warning",
+         # default keep-alive 5s: di concurrency tinggi koneksi idle diputus server
+         "--timeout-keep-alive", "60"],
+        cwd=ROOT.parent,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/cache/stats")
+            return proc, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"server {mode} tidak jalan")
+
+
+async def run_load(url, n_requests, concurrency, n_rows, n_items=50, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(n_requests):
+        after = f"TXR{rng.randrange(n_rows):08d}"
+        paths.append(f"/transactions/?limit=50&with_total=false&item_id=IT-{rng.randrange(n_items):03d}&after={after}")
+
+    latencies = []
+    queue = asyncio.Queue()
+    for p in paths:
+        queue.put_nowait(p)
+
+    async def worker(client):
+        while not queue.empty():
+            path = queue.get_nowait()
+            start = time.perf_counter()
+            r = await client.get(path)
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": n_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        seed_transactions(sqlite_engine(db_path), args.rows)
+
+        results = []
+        for mode in ("sync", "async"):
+            proc, url = start_server(mode, db_path, _free_port())
+            try:
+                asyncio.run(run_load(url, 100, 10, args.rows))  # pemanasan
+                for c in args.concurrency:
+                    r = asyncio.run(run_load(url, args.requests, c, args.rows))
+                    results.append((mode, c, r))
+            finally:
+                proc.terminate()
+                proc.wait()
+
+    print(f"{args.rows} baris, {args.requests} request per level")
+    print(f"{'mode':<7}{'conc':>6}{'req/s':>10}{'p50 (ms)':>11}{'p99 (ms)':>11}")
+    for mode, c, r in results:
+        print(f"{mode:<7}{c:>6}{r['rps']:>10.0f}{r['p50_ms']:>11.1f}{r['p99_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Overhead auth per request di app backend: get_current_user lama (decode JWT +
+SessionLocal baru + query User tiap request) vs versi cache token.
+
+Endpoint uji cuma memakai get_db (seperti router backend), jadi selisihnya
+dengan endpoint tanpa auth = biaya auth. Database SQLite file sementara,
+diakses lewat TestClient.
+
+Jalankan dari root repo:
+    python -m benchmarks.auth_overhead --requests 3000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend import auth, db as backend_db
+from backend.models import User
+from benchmarks.common import session_factory, sqlite_engine
+
+
+def build_app(SessionLocal):
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # salinan get_current_user lama sebagai pembanding
+    def old_get_current_user(credentials: HTTPAuthorizationCredentials = Depends(auth.security)):
+        token = credentials.credentials
+        try:
+            payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+            username = payload.get("sub")
+            if username is None:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            db = SessionLocal()
+            user = db.query(User).filter(User.username == username).first()
+            db.close()
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            return user
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+    app = FastAPI()
+    app.dependency_overrides[backend_db.get_db] = get_db
+
+    @app.get("/none")
+    def no_auth(db: Session = Depends(backend_db.get_db)):
+        return {"ok": True}
+
+    @app.get("/old")
+    def old_auth(db: Session = Depends(backend_db.get_db), user=Depends(old_get_current_user)):
+        return {"ok": True}
+
+    @app.get("/new")
+    def new_auth(db: Session = Depends(backend_db.get_db), user=Depends(auth.get_current_user)):
+        return {"ok": True}
+
+    return app
+
+
+def run(client, path, headers, n_requests):
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        client.get(path, headers=headers).raise_for_status()
+    return (time.perf_counter() - start) / n_requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sqlite_engine(Path(tmp) / "bench.db")
+        User.__table__.create(bind=engine)
+        SessionLocal = session_factory(engine)
+        with SessionLocal() as db:
+            db.add(User(username="admin", password="x"))
+            db.commit()
+
+        checkouts = [0]
+        event.listen(engine, "checkout", lambda *a: checkouts.__setitem__(0, checkouts[0] + 1))
+
+        headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'admin'})}"}
+        client = TestClient(build_app(SessionLocal))
+
+        results = {}
+        for path in ("/none", "/old", "/new"):
+            auth.token_cache.clear()
+            run(client, path, headers, 100)  # pemanasan
+            checkouts[0] = 0
+            per_request = run(client, path, headers, args.requests)
+            results[path] = (per_request, checkouts[0] / args.requests)
+
+    base = results["/none"][0]
+    print(f"{args.requests} request per endpoint")
+    print(f"{'endpoint':<10}{'ms/req':>9}{'auth (ms)':>11}{'checkout/req':>14}")
+    for path, (per_request, co) in results.items():
+        print(f"{path:<10}{per_request * 1000:>9.3f}{(per_request - base) * 1000:>11.3f}{co:>14.2f}")
+    print(f"cache: {auth.token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
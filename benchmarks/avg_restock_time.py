@@ -0,0 +1,83 @@
+"""
+Benchmark /analytics/avg-restock-time: agregat SQL vs versi lama (selisih dihitung di Python).
+
+    python -m benchmarks.avg_restock_time --rows 1000000
+"""
+import argparse
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.common import import_app, seed_transactions, session_factory, sqlite_engine
+
+
+def avg_restock_time_python(db, models):
+    """Implementasi sebelumnya: ambil semua baris IN, hitung selisih per item di Python."""
+    rows = (
+        db.query(
+            models.Transaction.item_id,
+            models.Transaction.item_name,
+            models.Transaction.tx_date,
+        )
+        .filter(
+            models.Transaction.qty_in > 0,
+            models.Transaction.tx_date.isnot(None),
+        )
+        .order_by(
+            models.Transaction.item_id,
+            models.Transaction.tx_date,
+            models.Transaction.transaction_id,
+        )
+        .all()
+    )
+
+    per_item_dates = defaultdict(list)
+    per_item_name = {}
+    for r in rows:
+        per_item_name.setdefault(r.item_id, r.item_name)
+        per_item_dates[r.item_id].append(r.tx_date)
+
+    data = []
+    for item_id, dates in per_item_dates.items():
+        if len(dates) < 2:
+            continue
+        diffs = [(dates[i] - dates[i - 1]).days for i in range(1, len(dates))]
+        data.append({
+            "item_id": item_id,
+            "item_name": per_item_name[item_id],
+            "avg_restock_days": sum(diffs) / len(diffs),
+        })
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    models = import_app("models")
+    analytics = import_app("routers.analytics")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sqlite_engine(Path(tmp) / "bench.db")
+        seed_transactions(engine, args.rows)
+        db = session_factory(engine)()
+
+        results = {}
+        for name, fn in [
+            ("sql", lambda: analytics.avg_restock_time(db=db)),
+            ("python", lambda: avg_restock_time_python(db, models)),
+        ]:
+            start = time.perf_counter()
+            results[name] = fn()
+            print(f"{name:<8}{time.perf_counter() - start:>8.3f} s  ({len(results[name])} item)")
+
+        same = results["sql"] == results["python"]
+        print(f"{args.rows} baris, hasil sama: {same}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
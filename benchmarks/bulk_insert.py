@@ -0,0 +1,117 @@
+"""
+Benchmark POST /transactions/ per baris vs POST /transactions/bulk (JSON
+array dan NDJSON) di SQLite. Summary analytics ikut dijaga di semua jalur
+dan dicek konsisten di akhir (analytics_summary.check).
+
+Jalankan dari root repo:
+    python -m benchmarks.bulk_insert --rows 50000 --single 2000 --chunk-size 5000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from benchmarks.common import import_app, seed_transactions, session_factory, sqlite_engine
+
+ADMIN = {"X-User-Role": "Admin Gudang"}
+
+
+def build_app(SessionLocal):
+    database = import_app("database")
+    transaction = import_app("routers.transaction")
+
+    app = FastAPI()
+    app.include_router(transaction.router)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = get_db
+    return app
+
+
+def make_rows(prefix, n, n_items=50, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        item = rng.randrange(n_items)
+        qty_in = rng.choice([0, 0, 0, 200, 350])
+        rows.append({
+            "transaction_id": f"{prefix}{i:08d}",
+            "date": f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/24",
+            "item_id": f"IT-{item:03d}",
+            "item_name": f"Item {item}",
+            "category_name": "serum",
+            "stock_awal": 500,
+            "stock_current": 500 + qty_in,
+            "qty_in": qty_in,
+            "qty_out": rng.randint(0, 300),
+            "restock_flag": "YES" if qty_in else "NO",
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--existing", type=int, default=100_000, help="baris yang sudah ada di tabel")
+    parser.add_argument("--rows", type=int, default=50_000, help="baris per request bulk")
+    parser.add_argument("--single", type=int, default=2000, help="jumlah POST satu-satu")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    analytics_summary = import_app("analytics_summary")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sqlite_engine(Path(tmp) / "bench.db")
+        seed_transactions(engine, args.existing)
+        SessionLocal = session_factory(engine)
+        with SessionLocal() as db:
+            analytics_summary.rebuild(db)
+        client = TestClient(build_app(SessionLocal))
+
+        results = {}
+
+        start = time.perf_counter()
+        for row in make_rows("SGL", args.single):
+            client.post("/transactions/", json=row, headers=ADMIN).raise_for_status()
+        results["per baris"] = (args.single, time.perf_counter() - start)
+
+        params = {"chunk_size": args.chunk_size}
+        body = json.dumps(make_rows("ARR", args.rows, seed=1))
+        start = time.perf_counter()
+        r = client.post("/transactions/bulk", content=body, params=params,
+                        headers={**ADMIN, "Content-Type": "application/json"})
+        results["bulk JSON"] = (r.json()["inserted"], time.perf_counter() - start)
+
+        body = "\n".join(json.dumps(row) for row in make_rows("NDJ", args.rows, seed=2))
+        start = time.perf_counter()
+        r = client.post("/transactions/bulk", content=body, params=params,
+                        headers={**ADMIN, "Content-Type": "application/x-ndjson"})
+        results["bulk NDJSON"] = (r.json()["inserted"], time.perf_counter() - start)
+
+        # kirim ulang batch NDJSON sebagai upsert: semua baris jadi update
+        start = time.perf_counter()
+        r = client.post("/transactions/bulk", content=body, params={**params, "on_duplicate": "upsert"},
+                        headers={**ADMIN, "Content-Type": "application/x-ndjson"})
+        results["bulk upsert"] = (r.json()["updated"], time.perf_counter() - start)
+
+        with SessionLocal() as db:
+            problems = analytics_summary.check(db)
+
+    print(f"{args.existing} baris awal, bulk {args.rows} baris, chunk_size={args.chunk_size}")
+    for name, (n, elapsed) in results.items():
+        print(f"{name:<12}{n / elapsed:>10.0f} rows/s  ({n} baris, {elapsed:.2f}s)")
+    print("summary konsisten" if not problems else f"summary TIDAK konsisten: {problems[:5]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Helper bersama untuk script benchmark (jalankan dari root repo: python -m benchmarks.<nama>)."""
+import importlib
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_app(module):
+    """Import modul dari package aplikasi (root repo ini) apa pun nama foldernya."""
+    if str(ROOT.parent) not in sys.path:
+        sys.path.insert(0, str(ROOT.parent))
+    return importlib.import_module(f"{ROOT.name}.{module}")
+
+
+def sqlite_engine(path):
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+
+def seed_transactions(engine, n_rows, n_items=50, chunk_size=50_000, seed=0):
+    """Isi tabel transaction dengan n_rows baris sintetis (bentuk mirip data.csv)."""
+    models = import_app("models")
+    database = import_app("database")
+    database.Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    categories = ["masker", "serum", "toner", "cleanser"]
+    table = models.Transaction.__table__
+
+    with engine.begin() as conn:
+        for offset in range(0, n_rows, chunk_size):
+            rows = []
+            for i in range(offset, min(offset + chunk_size, n_rows)):
+                item = i % n_items
+                day = start + timedelta(days=rng.randint(0, 730))
+                qty_in = rng.choice([0, 0, 0, 200, 350])
+                qty_out = rng.randint(0, 300)
+                rows.append({
+                    "Transaction ID": f"TXR{i:08d}",
+                    "Date": day.strftime("%m/%d/%y"),
+                    "Tx Date": day,
+                    "Item ID": f"IT-{item:03d}",
+                    "Item Name": f"Item {item}",
+                    "Category Name": categories[item % len(categories)],
+                    "Stock Awal": 500,
+                    "Current Stock": max(500 + qty_in - qty_out, 0),
+                    "IN": qty_in,
+                    "OUT": qty_out,
+                    "Target Stock": 500,
+                    "Safety Stock": qty_out / 2,
+                    "Restock YES": "YES" if qty_in else "NO",
+                    "Restock": qty_in,
+                })
+            conn.execute(insert(table), rows)
+
+
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,105 @@
+"""
+Benchmark rows/detik GET /transactions/: jalur lama (object ORM +
+model_validate + validasi response_model) vs jalur cepat (tuple kolom +
+FastJSONResponse). Kedua endpoint dipanggil lewat TestClient per halaman.
+
+Jalankan dari root repo:
+    python -m benchmarks.list_serialization --rows 200000 --limit 1000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import Depends, FastAPI, Query
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from benchmarks.common import import_app, seed_transactions, session_factory, sqlite_engine
+
+
+def build_app(SessionLocal):
+    database = import_app("database")
+    models = import_app("models")
+    schemas = import_app("schemas")
+    transaction = import_app("routers.transaction")
+
+    app = FastAPI()
+    app.include_router(transaction.router)
+
+    # salinan jalur lama (sebelum fast path) sebagai pembanding
+    @app.get(
+        "/old-transactions/",
+        response_model=list[schemas.TransactionOut],
+        response_model_exclude_none=True,
+    )
+    def old_list(
+        limit: int = Query(100, ge=1, le=1000),
+        after: str = None,
+        db: Session = Depends(database.get_db),
+    ):
+        query = db.query(models.Transaction)
+        if after is not None:
+            query = query.filter(models.Transaction.transaction_id > after)
+        txs = query.order_by(models.Transaction.transaction_id).limit(limit).all()
+        return [schemas.TransactionOut.model_validate(tx) for tx in txs]
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = get_db
+    return app
+
+
+def walk(client, path, limit, pages):
+    """Ambil `pages` halaman berturut-turut, return (jumlah baris, detik, body terakhir)."""
+    after = None
+    n_rows = 0
+    body = None
+    start = time.perf_counter()
+    for _ in range(pages):
+        params = {"limit": limit, "with_total": "false"}
+        if after is not None:
+            params["after"] = after
+        body = client.get(path, params=params).json()
+        if not body:
+            break
+        n_rows += len(body)
+        after = body[-1]["transaction_id"]
+    return n_rows, time.perf_counter() - start, body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = sqlite_engine(Path(tmp) / "bench.db")
+        seed_transactions(engine, args.rows)
+        client = TestClient(build_app(session_factory(engine)))
+
+        # pemanasan (cache halaman SQLite, import lazy)
+        walk(client, "/transactions/", args.limit, 2)
+        walk(client, "/old-transactions/", args.limit, 2)
+
+        results = {}
+        for name, path in (("lama", "/old-transactions/"), ("cepat", "/transactions/")):
+            n_rows, elapsed, last = walk(client, path, args.limit, args.pages)
+            results[name] = (n_rows, elapsed, last)
+
+    assert results["lama"][2] == results["cepat"][2], "isi response berbeda"
+
+    print(f"{args.rows} baris di tabel, limit={args.limit}, {args.pages} halaman")
+    for name, (n_rows, elapsed, _) in results.items():
+        print(f"{name:<6}{n_rows / elapsed:>12.0f} rows/s  ({elapsed:.2f}s untuk {n_rows} baris)")
+
+
+if __name__ == "__main__":
+    main()
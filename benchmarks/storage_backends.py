@@ -0,0 +1,78 @@
+"""
+Benchmark load time & memori backend penyimpanan crud_store (csv / arrow / parquet).
+
+Jalankan dari root repo:
+    python -m benchmarks.storage_backends --rows 1000000
+"""
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from crud_store import BACKENDS, BarangStore
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_table(n_rows):
+    sample = pd.read_csv(ROOT / "data" / "barang.csv")
+    reps = -(-n_rows // len(sample))
+    df = pd.concat([sample] * reps, ignore_index=True).iloc[:n_rows].copy()
+    df["Transaction_ID"] = [f"TXR{i:07d}" for i in range(n_rows)]
+    return df
+
+
+def _peak_rss_mb():
+    # ru_maxrss dalam KB di Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(backend, path, queue):
+    before = _peak_rss_mb()
+    start = time.perf_counter()
+    df = BarangStore(path, journal=False, backend=backend).snapshot()
+    elapsed = time.perf_counter() - start
+    queue.put({
+        "backend": backend,
+        "load_s": elapsed,
+        "peak_rss_mb": _peak_rss_mb() - before,
+        "frame_mb": df.memory_usage(deep=True).sum() / 2**20,
+        "file_mb": path.stat().st_size / 2**20,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_table(args.rows)
+    ctx = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for name, backend_cls in BACKENDS.items():
+            path = Path(tmp) / f"barang{backend_cls.suffix}"
+            backend_cls().write(df, path)
+
+            # proses baru per backend supaya angka memori tidak saling tercampur
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_measure, args=(name, path, queue))
+            proc.start()
+            results.append(queue.get())
+            proc.join()
+
+    print(f"{args.rows} baris")
+    print(f"{'backend':<10}{'load (s)':>10}{'RSS (MB)':>12}{'frame (MB)':>12}{'file (MB)':>12}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['load_s']:>10.3f}{r['peak_rss_mb']:>12.1f}"
+              f"{r['frame_mb']:>12.1f}{r['file_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,68 @@
-import pandas as pd
 from pathlib import Path
-import random
 from datetime import datetime
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from crud_store import BarangStore, BACKENDS, COLUMNS
 
 
 CSV_FILE = Path("data/barang.csv")
+TARGET_STOCK = 500
+
+# Format penyimpanan: csv (default), arrow (Arrow IPC, memory-mapped) atau parquet.
+# Untuk arrow / parquet, file-nya dibuat dari barang.csv saat pertama kali ditulis.
+STORAGE_BACKEND = os.getenv("BARANG_STORAGE", "csv")
+DATA_FILE = CSV_FILE.with_suffix(BACKENDS[STORAGE_BACKEND].suffix)
+
+# Satu store per proses: file di-parse sekali, dibaca ulang hanya kalau file berubah
+_store = BarangStore(DATA_FILE, backend=STORAGE_BACKEND, seed_file=CSV_FILE)
+
+
+def _writes(fn):
+    """Jalankan fungsi mutasi di writer store (baca-hitung-tulis jadi atomik)"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return _store.submit(lambda: fn(*args, **kwargs))
+    return wrapper
 
 
 # -------------------- Load & Save --------------------
 def load_data():
-    if CSV_FILE.exists():
-        return pd.read_csv(CSV_FILE)
-    else:
-        columns = ["Date","Item_ID","Item_Name","Category_Name","Current_Stock",
-                   "Stock_Awal","IN","OUT","Target_Stock","Bulan",
-                   "Safety_Stock","Restock_Status","Restock_Amount","Transaction_ID"]
-        return pd.DataFrame(columns=columns)
+    return _store.snapshot().copy()
 
 
 def save_data(df):
-    df.to_csv(CSV_FILE, index=False)
+    _store.replace(df)
 
 
 # -------------------- Get Barang --------------------
 def get_all_barang():
-    df = load_data()
-    return df.to_dict(orient="records")
+    return _store.records()
 
 
 def get_barang(item_id: str):
     """Ambil transaksi terakhir dari item tertentu"""
-    df = load_data()
-    df_item = df[df["Item_ID"] == item_id]
-    if not df_item.empty:
-        return df_item.iloc[-1].to_dict()
-    return None
+    return _store.find_last("Item_ID", item_id)
 
 
 def get_by_transaction(transaction_id: str):
-    df = load_data()
-    df_tx = df[df["Transaction_ID"] == transaction_id]
-    if not df_tx.empty:
-        return df_tx.iloc[-1].to_dict()
-    return None
+    return _store.find_last("Transaction_ID", transaction_id)
 
 
 # -------------------- Create Barang --------------------
+@_writes
 def create_barang_auto(data: dict):
-    df = load_data()
-
-
     item_id = data["Item_ID"]
     out_val = int(data["OUT"])
     date_str = data["Date"]
 
 
     # Ambil data terakhir dari item ini
-    df_item = df[df["Item_ID"] == item_id]
-    if not df_item.empty:
-        last_item = df_item.iloc[-1]
+    last_item = _store.find_last("Item_ID", item_id)
+    if last_item is not None:
         stock_awal = int(last_item["Current_Stock"])
         item_name = last_item["Item_Name"]
         category_name = last_item["Category_Name"]
@@ -67,8 +71,8 @@ def create_barang_auto(data: dict):
         item_name = f"Item {item_id}"
         category_name = "Category"
 
-    if not df_item.empty:
-        last_in_val = int(df_item.iloc[-1]["Restock_Amount"])
+    if last_item is not None:
+        last_in_val = int(last_item["Restock_Amount"])
     else:
         last_in_val = 0
 
@@ -94,14 +98,8 @@ def create_barang_auto(data: dict):
     restock_amount = target_stock - current_stock if restock_status == "YES" else 0
     
 
-    # Transaction_ID unik
-    existing_txr = set(df["Transaction_ID"].tolist())
-    def generate_txr(existing_ids):
-        while True:
-            txr = f"TXR{random.randint(100000, 999999)}"
-            if txr not in existing_ids:
-                return txr
-    transaction_id = generate_txr(existing_txr)
+    # Transaction_ID unik (set ID terpakai disimpan di allocator, tidak dibangun ulang)
+    transaction_id = _store.new_transaction_ids(1)[0]
 
 
     # Bulan dari tanggal
@@ -129,52 +127,209 @@ def create_barang_auto(data: dict):
     }
 
 
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    save_data(df)
+    # Cukup append satu record ke journal, CSV utama tidak ditulis ulang
+    _store.append([new_row])
     return new_row
 
 
+# -------------------- Create Barang (Batch) --------------------
+def _stock_chain(groups, out, start_level):
+    """
+    Hitung Current_Stock & status restock untuk rantai baris per item, sama
+    persis dengan memanggil create_barang_auto satu per satu.
+
+    groups      : kode item per baris (urutan baris = urutan event per item)
+    out         : OUT per baris (tidak boleh negatif)
+    start_level : stok tersedia sebelum baris pertama tiap item
+                  (Current_Stock + Restock_Amount baris sebelumnya)
+
+    Rantai dipecah jadi segmen: setiap baris YES menutup segmen, dan segmen
+    berikutnya selalu mulai dari TARGET_STOCK. Di dalam segmen stok = level
+    awal - cumsum OUT, dan restock pertama = baris pertama dengan
+    2 * (level - cumsum) < OUT, dicari dengan searchsorted pada cummax
+    2 * cumsum + OUT. Karena titik mulai segmen hanya bergantung pada baris
+    restock sebelumnya, rantai titik mulai diikuti dengan pointer doubling
+    (O(n log n), tanpa loop per baris / per restock).
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    out = np.asarray(out, dtype=np.int64)
+    start_level = np.asarray(start_level, dtype=np.int64)
+    n = len(out)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    if (out < 0).any():
+        raise ValueError("OUT tidak boleh negatif")
+
+    # baris tiap item dibuat berurutan (stable: urutan event per item tetap)
+    order = np.argsort(groups, kind="stable")
+    g = groups[order]
+    o = out[order]
+    first = np.r_[True, g[1:] != g[:-1]]
+    group_no = np.cumsum(first) - 1
+    group_start = np.flatnonzero(first)
+    group_end = np.r_[group_start[1:], n][group_no]
+    level0 = start_level[g]
+
+    csum = np.cumsum(o)
+    before = csum - o
+    # segmen mulai di i dengan level L restock di baris j >= i pertama dengan
+    # key[j] > 2 * L + 2 * before[i]
+    key = 2 * csum + o
+
+    # OUT > 2 * TARGET_STOCK selalu restock di segmen TARGET_STOCK, jadi
+    # batas blok: cummax per blok tidak ikut membawa key baris sebelumnya
+    big = o > 2 * TARGET_STOCK
+    block_first = first | np.r_[False, big[:-1]]
+    block_no = np.cumsum(block_first) - 1
+    block_end = np.r_[np.flatnonzero(block_first)[1:], n][block_no]
+
+    # offset per grup / blok -> satu cummax & searchsorted untuk semua item
+    offset = int(3 * csum[-1] + 2 * max(TARGET_STOCK, int(level0.max()))) + 1
+    by_group = np.maximum.accumulate(key + group_no * offset)
+    by_block = np.maximum.accumulate(key + block_no * offset)
+
+    # restock pertama tiap item (level awal = start_level)
+    first_restock = np.searchsorted(
+        by_group, 2 * level0[group_start] + 2 * before[group_start] + group_no[group_start] * offset,
+        side="right",
+    )
+    # titik mulai segmen berikutnya kalau segmen mulai di baris i dengan TARGET_STOCK
+    restock_at = np.searchsorted(by_block, 2 * TARGET_STOCK + 2 * before + block_no * offset, side="right")
+    next_start = np.where(restock_at < block_end, restock_at + 1, n)
+    next_start = np.where(next_start < group_end, next_start, n)
+
+    # ikuti rantai titik mulai: tiap putaran jumlah langkah yang diketahui dua kali lipat
+    starts = first_restock[first_restock + 1 < group_end[group_start]] + 1
+    jump = np.r_[next_start, n]
+    while True:
+        new = jump[starts]
+        new = new[new < n]
+        if not len(new):
+            break
+        starts = np.concatenate([starts, new])
+        jump = jump[jump]
+    is_start = first.copy()
+    is_start[starts] = True
+
+    start = np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+    level = np.where(start == group_start[group_no], level0, TARGET_STOCK)
+    cur = np.maximum(level - (csum - before[start]), 0)
+
+    current = np.empty(n, dtype=np.int64)
+    restock = np.empty(n, dtype=bool)
+    current[order] = cur
+    # current < OUT / 2  (dibandingkan dalam integer)
+    restock[order] = cur * 2 < o
+    return current, restock
+
+
+@_writes
+def create_barang_batch(events: list[dict]):
+    """
+    Insert banyak event OUT sekaligus ({"Item_ID", "OUT", "Date"}).
+    Event diurutkan per item lalu tanggal, stok dihitung tervektorisasi,
+    dan semua baris ditulis dalam satu kali append.
+    """
+    if not events:
+        return []
+
+    ev = pd.DataFrame(events, columns=["Item_ID", "OUT", "Date"])
+    ev["OUT"] = ev["OUT"].astype("int64")
+    if (ev["OUT"] < 0).any():
+        raise ValueError("OUT tidak boleh negatif")
+
+    parsed = pd.to_datetime(ev["Date"], format="%m/%d/%y", errors="coerce")
+    ev["_date"] = parsed
+    # stable: event item yang sama di tanggal yang sama tetap urut seperti input
+    ev = ev.sort_values(["Item_ID", "_date"], na_position="last", kind="stable").reset_index(drop=True)
+
+    groups, item_ids = pd.factorize(ev["Item_ID"])
+
+    # Kondisi awal tiap item = baris terakhirnya di tabel
+    start_current = np.zeros(len(item_ids), dtype=np.int64)
+    start_in = np.zeros(len(item_ids), dtype=np.int64)
+    item_names = []
+    category_names = []
+    for code, item_id in enumerate(item_ids):
+        last_item = _store.find_last("Item_ID", item_id)
+        if last_item is not None:
+            start_current[code] = int(last_item["Current_Stock"])
+            start_in[code] = int(last_item["Restock_Amount"])
+            item_names.append(last_item["Item_Name"])
+            category_names.append(last_item["Category_Name"])
+        else:
+            item_names.append(f"Item {item_id}")
+            category_names.append("Category")
+
+    out = ev["OUT"].to_numpy()
+    current, restock = _stock_chain(groups, out, start_current + start_in)
+    restock_amount = np.where(restock, TARGET_STOCK - current, 0)
+
+    # Stock_Awal / IN = Current_Stock / Restock_Amount baris sebelumnya di item yang sama
+    first = np.r_[True, groups[1:] != groups[:-1]]
+    stock_awal = np.where(first, start_current[groups], np.r_[0, current[:-1]])
+    in_val = np.where(first, start_in[groups], np.r_[0, restock_amount[:-1]])
+
+    result = pd.DataFrame({
+        "Date": ev["Date"],
+        "Item_ID": ev["Item_ID"],
+        "Item_Name": np.asarray(item_names, dtype=object)[groups],
+        "Category_Name": np.asarray(category_names, dtype=object)[groups],
+        "Current_Stock": current,
+        "Stock_Awal": stock_awal,
+        "IN": in_val,
+        "OUT": out,
+        "Target_Stock": TARGET_STOCK,
+        "Bulan": ev["_date"].dt.strftime("%b-%Y").fillna("Unknown"),
+        "Safety_Stock": out / 2,
+        "Restock_Status": np.where(restock, "YES", "NO"),
+        "Restock_Amount": restock_amount,
+        "Transaction_ID": _store.new_transaction_ids(len(ev)),
+    })
 
-
-
-
+    rows = result.to_dict(orient="records")
+    _store.append(rows)
+    return rows
 
 
 # -------------------- Delete Barang --------------------
 def delete_transaction(transaction_id: str):
-    df = load_data()
-    before = len(df)
-   
-    # Hapus baris dengan Transaction_ID yang sama
-    df = df[df["Transaction_ID"] != transaction_id]
-
-
-    if len(df) == before:
-        # Tidak ada baris yang dihapus
-        return False
-
-
-    save_data(df)
-    return True
+    # Hapus baris dengan Transaction_ID yang sama (ditulis sebagai tombstone di journal)
+    return _store.delete(transaction_id)
 
 
 def update_transaction(transaction_id: str, update_data: dict):
+    """
+    Update transaksi lalu hitung ulang baris berikutnya dari item yang sama.
+    Return baris hasil update, atau None kalau Transaction_ID tidak ada.
+
+    Transaction_ID dianggap unik (dijamin id_allocator); kalau data lama
+    punya ID dobel, hanya baris terakhir yang di-update.
+    """
+    row, _ = update_transaction_repaired(transaction_id, update_data)
+    return row
+
+
+@_writes
+def update_transaction_repaired(transaction_id: str, update_data: dict):
+    """
+    Seperti update_transaction, tapi return (row, repaired): repaired =
+    jumlah baris berikutnya yang ikut berubah. (None, 0) kalau tidak ada.
+    """
     try:
-        df = load_data()
-        idx = df.index[df["Transaction_ID"] == transaction_id]
+        row = _store.find_last("Transaction_ID", transaction_id)
 
 
-        if len(idx) == 0:
-            return None
+        if row is None:
+            return None, 0
 
 
         # Update field
         for key, value in update_data.items():
-            df.loc[idx, key] = value
+            row[key] = value
 
 
         # Recalculate stock
-        row = df.loc[idx[-1]]
         stock_awal = int(row["Stock_Awal"])
         out_val = int(row["OUT"])
         in_val = int(row["IN"])
@@ -185,15 +340,71 @@ def update_transaction(transaction_id: str, update_data: dict):
         restock_amount = target_stock - current_stock if restock_status == "YES" else 0
 
 
-        df.loc[idx, "Current_Stock"] = current_stock
-        df.loc[idx, "Safety_Stock"] = safety_stock
-        df.loc[idx, "Restock_Status"] = restock_status
-        df.loc[idx, "Restock_Amount"] = restock_amount
-        df.loc[idx, "IN"] = restock_amount if restock_status == "YES" else in_val
+        row["Stock_Awal"] = stock_awal
+        row["OUT"] = out_val
+        row["Current_Stock"] = current_stock
+        row["Safety_Stock"] = safety_stock
+        row["Restock_Status"] = restock_status
+        row["Restock_Amount"] = restock_amount
+        row["IN"] = restock_amount if restock_status == "YES" else in_val
 
 
-        save_data(df)
-        return df.loc[idx[-1]].to_dict()
+        # Record patch satu baris di journal, bukan tulis ulang seluruh CSV
+        _store.put(row)
+
+        # Baris-baris berikutnya dari item ini ikut dihitung ulang
+        repaired = repair_ledger(transaction_id)
+        return row, repaired
     except Exception as e:
         print("ERROR update_transaction:", e)
-        raise
\ No newline at end of file
+        raise
+
+
+@_writes
+def repair_ledger(transaction_id: str):
+    """
+    Hitung ulang Stock_Awal, IN, Current_Stock dan status restock semua baris
+    item yang sama setelah transaksi ini. Return jumlah baris yang berubah.
+    """
+    start = _store.find_last("Transaction_ID", transaction_id)
+    if start is None:
+        return 0
+
+    tail = _store.item_frame_after(transaction_id)
+    if tail.empty:
+        return 0
+
+    out = tail["OUT"].astype("int64").to_numpy()
+    start_current = int(start["Current_Stock"])
+    start_in = int(start["Restock_Amount"])
+
+    groups = np.zeros(len(tail), dtype=np.int64)
+    current, restock = _stock_chain(groups, out, [start_current + start_in])
+    restock_amount = np.where(restock, TARGET_STOCK - current, 0)
+
+    repaired = pd.DataFrame({
+        "Stock_Awal": np.r_[start_current, current[:-1]],
+        "IN": np.r_[start_in, restock_amount[:-1]],
+        "Current_Stock": current,
+        "Safety_Stock": out / 2,
+        "Restock_Status": np.where(restock, "YES", "NO"),
+        "Restock_Amount": restock_amount,
+    })
+
+    old = tail[repaired.columns]
+    old = old.astype({col: repaired[col].dtype for col in repaired.columns})
+    changed = (old != repaired).any(axis=1).to_numpy()
+    if not changed.any():
+        return 0
+
+    rows = tail[changed].copy()
+    for col in repaired.columns:
+        rows[col] = repaired[col].to_numpy()[changed]
+    _store.put_many(rows.to_dict(orient="records"))
+    return int(changed.sum())
+
+
+# -------------------- Compaction --------------------
+def compact_data():
+    """Lipat journal ke barang.csv (bisa dipanggil manual / dari job terjadwal)"""
+    _store.compact()
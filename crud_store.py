@@ -0,0 +1,626 @@
+import bisect
+import collections
+import contextlib
+import json
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+from txr_allocator import TxrAllocator
+
+
+COLUMNS = ["Date","Item_ID","Item_Name","Category_Name","Current_Stock",
+           "Stock_Awal","IN","OUT","Target_Stock","Bulan",
+           "Safety_Stock","Restock_Status","Restock_Amount","Transaction_ID"]
+
+# Kolom teks low-cardinality & kolom kuantitas (untuk dtype ringkas di backend columnar)
+CATEGORY_COLUMNS = ["Item_ID", "Item_Name", "Category_Name", "Bulan", "Restock_Status"]
+QUANTITY_COLUMNS = ["Current_Stock", "Stock_Awal", "IN", "OUT", "Target_Stock", "Restock_Amount"]
+
+# Journal di-compact kalau jumlah op >= max(COMPACT_MIN_OPS, jumlah baris * COMPACT_RATIO)
+COMPACT_MIN_OPS = 1000
+COMPACT_RATIO = 0.5
+# Baris yang dihapus cuma ditandai (tombstone); dibuang fisik setelah sebanyak ini
+MAX_TOMBSTONES = 64
+
+
+def _json_default(value):
+    # scalar numpy (int64 / float64) dari baris pandas
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def compact_dtypes(df):
+    """Teks low-cardinality -> category, kuantitas -> integer sekecil mungkin."""
+    df = df.astype({col: "category" for col in CATEGORY_COLUMNS})
+    for col in QUANTITY_COLUMNS:
+        if df[col].dtype.kind in "iu" and df[col].dtype.itemsize < 8:
+            continue  # sudah compact (mis. dari file arrow) -> jangan salin buffer mmap
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Backend arrow / parquet butuh paket pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+# -------------------- Storage backends --------------------
+class CsvBackend:
+    suffix = ".csv"
+    memory_mapped = False
+
+    def read(self, path):
+        return pd.read_csv(path)
+
+    def write(self, df, path):
+        df.to_csv(path, index=False)
+
+    def normalize(self, df):
+        return df
+
+
+class ArrowBackend:
+    """Arrow IPC (Feather v2) tanpa kompresi, dibaca lewat memory map.
+
+    File ditulis satu chunk per kolom supaya to_pandas(split_blocks=True) bisa
+    memakai buffer mmap langsung untuk kolom numerik tanpa null dan kolom teks
+    (string arrow); kolom category tetap dikonversi (disalin) saat read.
+    """
+    suffix = ".arrow"
+    # kolom hasil read() berbagi buffer read-only dengan file
+    memory_mapped = True
+
+    def read(self, path):
+        pa = _pyarrow()
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(split_blocks=True)
+
+    def write(self, df, path):
+        pa = _pyarrow()
+        table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+        # banyak chunk -> to_pandas harus menggabung (menyalin) kolom numerik
+        table = table.combine_chunks()
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def normalize(self, df):
+        return compact_dtypes(df)
+
+
+class ParquetBackend(ArrowBackend):
+    """Parquet di-decode saat read, jadi hasilnya selalu salinan (tanpa mmap)."""
+    suffix = ".parquet"
+    memory_mapped = False
+
+    def read(self, path):
+        pa = _pyarrow()
+        return pa.parquet.read_table(str(path)).to_pandas()
+
+    def write(self, df, path):
+        pa = _pyarrow()
+        table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+        pa.parquet.write_table(table, str(path))
+
+
+BACKENDS = {
+    "csv": CsvBackend,
+    "arrow": ArrowBackend,
+    "parquet": ParquetBackend,
+}
+
+
+class _Pending:
+    def __init__(self, fn):
+        self.fn = fn
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+def _stat(path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class BarangStore:
+    """
+    Cache in-memory untuk file data barang (satu instance per proses).
+    File hanya di-parse ulang kalau mtime / size-nya berubah.
+
+    Format file ditentukan `backend` ("csv", "arrow", "parquet"). Backend
+    columnar menyimpan kolom teks sebagai dictionary / category dan kolom
+    kuantitas sebagai integer sempit. Kalau file datanya belum ada, tabel
+    diambil dari `seed_file` (CSV) bila diberikan.
+
+    Mode journal (default): insert / update / delete ditulis sebagai record
+    JSON per baris di `<data>.journal`, jadi biaya tulis sebanding dengan
+    perubahannya, bukan dengan ukuran tabel. compact() melipat journal
+    kembali ke file utama.
+
+    Dua index hash dijaga di setiap mutasi supaya point lookup O(1):
+    Transaction_ID -> posisi baris, dan Item_ID -> daftar posisi baris item
+    itu (urut, elemen terakhir = baris terbaru).
+
+    Delete hanya mencabut posisi baris dari kedua index dan menandainya
+    di `_dead`; baris itu dilewati oleh snapshot() / records() dan baru
+    dibuang fisik saat compact() atau setelah MAX_TOMBSTONES delete.
+
+    Transaction_ID baru diambil dari `id_allocator`, yang di-seed ulang
+    setiap kali tabel di-load.
+
+    Semua mutasi lewat submit(): antrean satu writer dengan group commit.
+    Thread yang mendapat giliran menjalankan semua mutasi yang sedang
+    antre di bawah lock file eksklusif (`<csv>.lock`, aman antar worker
+    uvicorn), membaca ulang file kalau proses lain sudah menulis, lalu
+    menyimpan semuanya dalam satu kali tulis. Pembaca memegang lock
+    shared selama me-load, jadi selalu melihat snapshot yang konsisten.
+    """
+
+    def __init__(self, data_file, journal=True, id_allocator=None,
+                 backend="csv", seed_file=None):
+        self.data_file = Path(data_file)
+        self.backend = BACKENDS[backend]()
+        self.seed_file = Path(seed_file) if seed_file else None
+        self.journal_file = self.data_file.with_suffix(".journal") if journal else None
+        self.lock_file = self.data_file.with_suffix(".lock")
+        self._lock = threading.RLock()
+        self._commit_mutex = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._queue = collections.deque()
+        self._staged = None
+        self._file_locked = False
+        self._local = threading.local()
+        self._df = None
+        self._mapped = False
+        self._tail = []
+        self._tx_index = {}
+        self._item_index = {}
+        self._dead = set()
+        self.id_allocator = id_allocator or TxrAllocator()
+        self._journal_ops = 0
+        self._signature = None
+
+    # -------------------- Disk --------------------
+    def _stat_signature(self):
+        journal = _stat(self.journal_file) if self.journal_file else None
+        return (_stat(self.data_file), journal)
+
+    def _read(self):
+        if self.data_file.exists():
+            df = self.backend.read(self.data_file)
+        elif self.seed_file is not None and self.seed_file.exists():
+            df = pd.read_csv(self.seed_file)
+        else:
+            df = pd.DataFrame(columns=COLUMNS)
+        return self.backend.normalize(df)
+
+    def _load(self):
+        self._df = self._read().reset_index(drop=True)
+        self._mapped = self.backend.memory_mapped
+        self._tail = []
+        self._dead = set()
+        self._journal_ops = 0
+        self._rebuild_indexes()
+
+        if self.journal_file and self.journal_file.exists():
+            with open(self.journal_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # baris terakhir yang setengah tertulis (proses mati di tengah append)
+                        break
+                    self._apply(record)
+                    self._journal_ops += 1
+
+        self._signature = self._stat_signature()
+
+    def _refresh(self):
+        if self._df is None or self._stat_signature() != self._signature:
+            with self._file_lock(shared=True):
+                self._load()
+
+    @contextlib.contextmanager
+    def _file_lock(self, shared=False):
+        """Advisory lock antar proses. Dipanggil sambil memegang self._lock."""
+        if self._file_locked:
+            yield
+            return
+
+        with open(self.lock_file, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            else:
+                # msvcrt tidak punya lock shared, jadi di Windows selalu eksklusif
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            self._file_locked = True
+            try:
+                yield
+            finally:
+                self._file_locked = False
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_file(self, df):
+        # tulis ke file sementara lalu rename, supaya pembaca tidak melihat file setengah jadi
+        tmp_file = self.data_file.with_name(self.data_file.name + ".tmp")
+        self.backend.write(df, tmp_file)
+        # backend sudah menutup (flush) filenya; fsync supaya isinya di disk sebelum
+        # rename, kalau tidak setelah crash file data bisa kosong/terpotong.
+        # "rb+" karena os.fsync di Windows butuh handle yang bisa ditulis
+        with open(tmp_file, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.data_file)
+        # rename baru permanen setelah entri direktorinya di-fsync (POSIX saja;
+        # di Windows direktori tidak bisa dibuka untuk fsync)
+        if fcntl is not None:
+            dir_fd = os.open(self.data_file.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _persist(self, records):
+        if self.journal_file is None:
+            self._write_file(self._frame())
+        else:
+            lines = "".join(
+                json.dumps(r, default=_json_default) + "\n" for r in records
+            )
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_ops += len(records)
+
+        self._signature = self._stat_signature()
+
+        if self.journal_file is not None and self._journal_ops >= max(
+            COMPACT_MIN_OPS, int(self._row_count() * COMPACT_RATIO)
+        ):
+            self._compact()
+
+    # -------------------- Writer (group commit) --------------------
+    def submit(self, fn):
+        """
+        Jalankan mutasi fn() lewat writer store dan tunggu hasilnya.
+        Di dalam fn, read & write ke store melihat state terbaru di disk.
+        """
+        if getattr(self._local, "in_commit", False):
+            # sudah di dalam group commit (mutasi bersarang)
+            return fn()
+
+        pending = _Pending(fn)
+        with self._queue_lock:
+            self._queue.append(pending)
+
+        while not pending.done:
+            with self._commit_mutex:
+                if not pending.done:
+                    self._group_commit()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _group_commit(self):
+        with self._queue_lock:
+            batch = list(self._queue)
+            self._queue.clear()
+        if not batch:
+            return
+
+        with self._lock, self._file_lock():
+            self._local.in_commit = True
+            self._staged = []
+            try:
+                # proses lain mungkin sudah menulis sejak load terakhir
+                self._refresh()
+                for pending in batch:
+                    try:
+                        pending.result = pending.fn()
+                    except Exception as e:
+                        pending.error = e
+                if self._staged:
+                    self._persist(self._staged)
+            except Exception as e:
+                # state in-memory sudah berubah tapi disk belum -> paksa reload berikutnya
+                self.invalidate()
+                for pending in batch:
+                    if pending.error is None:
+                        pending.error = e
+            finally:
+                self._staged = None
+                self._local.in_commit = False
+                for pending in batch:
+                    pending.done = True
+
+    # -------------------- In-memory --------------------
+    def _rows_frame(self):
+        """Semua baris fisik (termasuk tombstone), posisi = index _tx_index / _item_index."""
+        if self._tail:
+            tail_df = pd.DataFrame(self._tail, columns=COLUMNS)
+            if self._df.empty:
+                df = tail_df
+            else:
+                df = pd.concat([self._df, tail_df], ignore_index=True)
+            self._df = self.backend.normalize(df)
+            self._mapped = False
+            self._tail = []
+        return self._df
+
+    def _frame(self):
+        """Baris yang masih hidup (tanpa tombstone)."""
+        df = self._rows_frame()
+        if self._dead:
+            df = df.drop(index=list(self._dead)).reset_index(drop=True)
+        return df
+
+    def _row_count(self):
+        return len(self._df) + len(self._tail)
+
+    def _rebuild_indexes(self):
+        self._reindex()
+        self.id_allocator.seed(self._tx_index.keys())
+
+    def _reindex(self):
+        df = self._rows_frame()
+        self._tx_index = dict(zip(df["Transaction_ID"].tolist(), range(len(df))))
+        self._item_index = {
+            item_id: positions.tolist()
+            for item_id, positions in df.groupby("Item_ID", sort=False).indices.items()
+        }
+
+    def _drop_dead(self):
+        """Buang baris tombstone secara fisik; posisi bergeser -> index dibangun ulang."""
+        if not self._dead:
+            return
+        self._df = self._frame()
+        self._mapped = False
+        self._dead = set()
+        # ID yang terhapus tetap tercatat di allocator, jadi tidak perlu seed ulang
+        self._reindex()
+
+    def _index_row(self, pos, row):
+        self._tx_index[row["Transaction_ID"]] = pos
+        self.id_allocator.add(row["Transaction_ID"])
+        positions = self._item_index.setdefault(row["Item_ID"], [])
+        if not positions or positions[-1] < pos:
+            positions.append(pos)
+        else:
+            bisect.insort(positions, pos)
+
+    def _unindex_row(self, pos, row):
+        if self._tx_index.get(row["Transaction_ID"]) == pos:
+            del self._tx_index[row["Transaction_ID"]]
+        positions = self._item_index.get(row["Item_ID"])
+        if positions:
+            i = bisect.bisect_left(positions, pos)
+            if i < len(positions) and positions[i] == pos:
+                positions.pop(i)
+            if not positions:
+                del self._item_index[row["Item_ID"]]
+
+    def _position(self, column, value):
+        """Posisi baris terakhir dengan column == value, atau None."""
+        if column == "Transaction_ID":
+            return self._tx_index.get(value)
+        if column == "Item_ID":
+            positions = self._item_index.get(value)
+            return positions[-1] if positions else None
+        raise KeyError(f"Tidak ada index untuk kolom {column}")
+
+    def _get(self, pos):
+        n = len(self._df)
+        if pos >= n:
+            return dict(self._tail[pos - n])
+        return self._df.iloc[pos].to_dict()
+
+    def _rows(self, positions):
+        """Seperti [_get(p) for p in positions], tapi satu kali iloc untuk bagian frame."""
+        n = len(self._df)
+        i = bisect.bisect_left(positions, n)
+        rows = self._df.iloc[positions[:i]].to_dict(orient="records") if i else []
+        rows.extend(dict(self._tail[p - n]) for p in positions[i:])
+        return rows
+
+    def _set(self, pos, row):
+        old = self._get(pos)
+        if (old["Transaction_ID"], old["Item_ID"]) != (row["Transaction_ID"], row["Item_ID"]):
+            self._unindex_row(pos, old)
+            self._index_row(pos, row)
+
+        n = len(self._df)
+        if pos >= n:
+            self._tail[pos - n] = dict(row)
+            return
+        if self._mapped:
+            # buffer hasil memory map read-only -> salin sekali sebelum update pertama
+            self._df = self._df.copy()
+            self._mapped = False
+        for col in COLUMNS:
+            if col in row:
+                self._fit_dtype(col, row[col])
+                self._df.at[pos, col] = row[col]
+
+    def _fit_dtype(self, col, value):
+        """Lebarkan dtype ringkas (category / int sempit) kalau nilai baru tidak muat."""
+        dtype = self._df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            if not pd.isna(value) and value not in dtype.categories:
+                self._df[col] = self._df[col].cat.add_categories([value])
+        elif dtype != np.int64 and pd.api.types.is_integer_dtype(dtype):
+            info = np.iinfo(dtype)
+            if isinstance(value, (int, np.integer)) and not info.min <= value <= info.max:
+                self._df[col] = self._df[col].astype(np.int64)
+
+    def _add(self, row):
+        self._index_row(self._row_count(), row)
+        self._tail.append(dict(row))
+
+    def _upsert(self, row):
+        pos = self._position("Transaction_ID", row["Transaction_ID"])
+        if pos is None:
+            self._add(row)
+        else:
+            self._set(pos, row)
+
+    def _remove(self, transaction_id):
+        pos = self._tx_index.get(transaction_id)
+        if pos is None:
+            return False
+        # soft delete: posisi baris lain tidak bergeser, index cukup dicabut satu entri
+        self._unindex_row(pos, self._get(pos))
+        self._dead.add(pos)
+        if len(self._dead) >= MAX_TOMBSTONES:
+            self._drop_dead()
+        return True
+
+    def _apply(self, record):
+        op = record["op"]
+        if op in ("I", "U"):
+            self._upsert(record["row"])
+        elif op == "D":
+            self._remove(record["id"])
+
+    # -------------------- Read --------------------
+    def snapshot(self):
+        """Frame yang sedang aktif. Jangan di-mutate langsung."""
+        with self._lock:
+            self._refresh()
+            return self._frame()
+
+    def records(self):
+        with self._lock:
+            self._refresh()
+            return self._frame().to_dict(orient="records")
+
+    def find_last(self, column, value):
+        """Baris terakhir (dict) dengan column == value (Item_ID / Transaction_ID), atau None."""
+        with self._lock:
+            self._refresh()
+            pos = self._position(column, value)
+            return None if pos is None else self._get(pos)
+
+    def item_rows(self, item_id):
+        """Semua baris satu item, urut dari yang paling lama."""
+        with self._lock:
+            self._refresh()
+            return self._rows(self._item_index.get(item_id, []))
+
+    def item_rows_after(self, transaction_id):
+        """Baris-baris item yang sama yang datang setelah transaksi ini."""
+        with self._lock:
+            self._refresh()
+            pos = self._tx_index.get(transaction_id)
+            if pos is None:
+                return []
+            positions = self._item_index[self._get(pos)["Item_ID"]]
+            i = bisect.bisect_right(positions, pos)
+            return self._rows(positions[i:])
+
+    def item_frame_after(self, transaction_id):
+        """Seperti item_rows_after, tapi sebagai DataFrame (satu kali iloc)."""
+        with self._lock:
+            self._refresh()
+            pos = self._tx_index.get(transaction_id)
+            if pos is None:
+                return pd.DataFrame(columns=COLUMNS)
+            positions = self._item_index[self._get(pos)["Item_ID"]]
+            i = bisect.bisect_right(positions, pos)
+            return self._rows_frame().iloc[positions[i:]].reset_index(drop=True)
+
+    # -------------------- Write --------------------
+    def new_transaction_ids(self, n=1):
+        return self.submit(lambda: self.id_allocator.reserve(n))
+
+    def append(self, rows):
+        def apply():
+            for row in rows:
+                self._add(row)
+            self._staged.extend({"op": "I", "row": row} for row in rows)
+
+        self.submit(apply)
+
+    def put(self, row):
+        """Update baris dengan Transaction_ID yang sama (insert kalau belum ada)."""
+        self.put_many([row])
+
+    def put_many(self, rows):
+        def apply():
+            for row in rows:
+                self._upsert(row)
+            self._staged.extend({"op": "U", "row": row} for row in rows)
+
+        self.submit(apply)
+
+    def delete(self, transaction_id):
+        def apply():
+            if not self._remove(transaction_id):
+                return False
+            self._staged.append({"op": "D", "id": transaction_id})
+            return True
+
+        return self.submit(apply)
+
+    def replace(self, df):
+        """Tulis ulang seluruh tabel (dan kosongkan journal)."""
+        def apply():
+            self._df = df.reset_index(drop=True)
+            self._tail = []
+            self._dead = set()
+            self._rebuild_indexes()
+            self._compact()
+
+        self.submit(apply)
+
+    def compact(self):
+        """Lipat journal ke CSV utama lalu kosongkan journal."""
+        self.submit(self._compact)
+
+    def _compact(self):
+        self._drop_dead()
+        self._write_file(self._frame())
+        # replay journal bersifat idempotent (insert = upsert), jadi kalau proses
+        # mati di antara dua langkah ini, journal lama aman di-replay lagi
+        if self.journal_file is not None and self.journal_file.exists():
+            open(self.journal_file, "w").close()
+        if self._staged:
+            # mutasi yang masih antre sudah ikut tertulis di CSV
+            self._staged.clear()
+        self._journal_ops = 0
+        self._signature = self._stat_signature()
+
+    def invalidate(self):
+        with self._lock:
+            self._df = None
+            self._tail = []
+            self._tx_index = {}
+            self._item_index = {}
+            self._dead = set()
+            self._signature = None
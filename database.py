@@ -1,9 +1,12 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from .config import settings
-from sqlalchemy import func
+from .pool_metrics import PoolMetrics
+from sqlalchemy import exists, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import os
 
 # Base class untuk model ORM
@@ -16,16 +19,60 @@ Base = declarative_base()
 # >>> GUNAKAN settings.DATABASE_URL (Koneksi MySQL) <<<
 DATABASE_URL = settings.DATABASE_URL 
 
+def _engine_kwargs(url, queue_pool, metrics):
+    """Setting engine & pool dari config (env DB_POOL_*, DB_QUERY_CACHE_SIZE)."""
+    kwargs = dict(
+        echo=False,
+        # pool_pre_ping penting untuk koneksi MySQL (bisa dimatikan lewat DB_POOL_PRE_PING=0)
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    )
+    # SQLite in-memory pakai pool khusus bawaan SQLAlchemy, tanpa setting ukuran
+    if url.startswith("sqlite") and (":memory:" in url or url.split("://", 1)[1] in ("", "/")):
+        return kwargs
+    kwargs.update(
+        poolclass=metrics.pool_class(queue_pool),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return kwargs
+
+
+# metrik pool (lihat pool_metrics.py, endpoint GET /admin/pool)
+pool_metrics = PoolMetrics()
+
 engine = create_engine(
     DATABASE_URL, # Menggunakan string koneksi MySQL dari settings
-    echo=False,
-    # Kembalikan pool_pre_ping (Penting untuk koneksi MySQL)
-    pool_pre_ping=True, 
-    # HAPUS connect_args={"check_same_thread": False} (Ini hanya untuk SQLite)
+    # connect_args={"check_same_thread": False} hanya kalau DATABASE_URL diarahkan ke SQLite
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    **_engine_kwargs(DATABASE_URL, QueuePool, pool_metrics),
 )
+pool_metrics.attach(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# -------------------------
+# ASYNC MODE (opt-in, settings.DB_MODE == "async")
+# -------------------------
+async_engine = None
+AsyncSessionLocal = None
+async_pool_metrics = None
+
+if settings.DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_pool_metrics = PoolMetrics()
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        **_engine_kwargs(settings.ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, async_pool_metrics),
+    )
+    async_pool_metrics.attach(async_engine.sync_engine)
+    # expire_on_commit=False: atribut object tetap bisa dibaca setelah commit
+    # tanpa lazy load di luar greenlet
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # -------------------------
 # TEST MODE (Override by pytest) - Biarkan apa adanya
 # -------------------------
@@ -57,30 +104,68 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
+    # import lokal (models import database); harus sebelum create_all supaya
+    # semua tabel sudah terdaftar di Base.metadata
+    from . import analytics_summary, models  # noqa: F401
+    from .backfill_dates import ensure_tx_date_column
+
     Base.metadata.create_all(bind=engine)
+    # tabel transaction lama belum punya kolom Tx Date yang dipakai rebuild
+    ensure_tx_date_column(engine)
+    with SessionLocal() as db:
+        if analytics_summary.ensure_built(db):
+            print("Summary analytics kosong, sudah di-rebuild dari tabel transaction.")
 
 # FUNGSI BARU: Mengisi Kategori Berdasarkan Data Transaksi
+def insert_missing_categories(db_session, models):
+    """
+    Insert-if-missing set-based: nama unik lower(trim("Category Name")) dari
+    tabel transaction yang belum ada di categories. Kategori lama tidak
+    disentuh (id tetap). Return [(id, name)] yang baru dibuat; commit oleh caller.
+    """
+    category = models.Category.__table__
+    raw = models.Transaction.category_name
+    name = func.lower(func.trim(raw))
+    missing = (
+        select(name)
+        .where(raw.isnot(None), name != "", ~exists().where(category.c.name == name))
+        .distinct()
+    )
+    dialect = db_session.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        # satu statement: INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING
+        insert_fn = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        stmt = (
+            insert_fn(category)
+            .from_select(["name"], missing)
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(category.c.id, category.c.name)
+        )
+        return sorted(db_session.execute(stmt).all())
+
+    # MySQL tidak punya INSERT ... RETURNING: jumlah query tetap 3, berapa pun kategorinya
+    names = db_session.execute(missing).scalars().all()
+    if not names:
+        return []
+    db_session.execute(insert(category).prefix_with("IGNORE", dialect="mysql"), [{"name": n} for n in names])
+    return db_session.execute(
+        select(category.c.id, category.c.name).where(category.c.name.in_(names)).order_by(category.c.id)
+    ).all()
+
+
 def seed_categories(db_session, models):
     """
-    Mengambil nama kategori unik dari tabel data_uas, membersihkan spasi/case, 
-    dan memasukkannya ke tabel categories.
+    Tambahkan kategori dari tabel transaction yang belum ada (nama dibersihkan
+    spasi/case). Aman dipanggil setiap restart: kategori yang sudah ada dan
+    id-nya tidak berubah.
     """
-    # Membersihkan kategori yang ada (agar tidak ada duplikasi setiap restart)
-    db_session.query(models.Category).delete()
-    
-    # 1. Ambil nama kategori unik dari tabel data_uas (setelah pembersihan spasi/case)
-    # Ini harus sinkron dengan logika clean_category di analytics.py
-    unique_categories_raw = db_session.query(
-        func.lower(func.trim(models.DataUAS.category_name))
-    ).distinct().all()
-    
-    # 2. Masukkan ke tabel categories
-    new_categories = []
-    for (name,) in unique_categories_raw:
-        if name:
-            new_categories.append(models.Category(name=name))
-    
-    db_session.add_all(new_categories)
+    insert_missing_categories(db_session, models)
     db_session.commit()
-    db_session.close()
\ No newline at end of file
+    db_session.close()
@@ -0,0 +1,31 @@
+from datetime import datetime, date
+
+from sqlalchemy import extract, func
+
+
+# Format tanggal yang ada di kolom Date (campuran ISO dan format CSV m/d/yy)
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%y", "%d/%m/%y")
+
+
+def parse_date_str(d: str) -> date | None:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(d, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def year_month(column):
+    """(tahun, bulan) dari kolom DATE, bisa dipakai di SQLite maupun MySQL."""
+    return extract("year", column), extract("month", column)
+
+
+def days_between(later, earlier, dialect):
+    """Selisih hari (later - earlier) antara dua ekspresi DATE, per dialect."""
+    if dialect.name == "sqlite":
+        return func.julianday(later) - func.julianday(earlier)
+    if dialect.name == "postgresql":
+        return later - earlier
+    return func.datediff(later, earlier)
+
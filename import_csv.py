@@ -1,61 +1,176 @@
-import mysql.connector
-import csv
-from datetime import datetime
-
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="@Jessie6162201036",
-    database="wms_db"
-)
-
-cursor = db.cursor()
-
-def convert_date(value):
-    """
-    Convert format '1/13/24' → '2024-01-13'
-    """
-    # Kalau kosong, balikin NULL
-    if value.strip() == "":
-        return None
-    
-    # Ubah ke format MySQL
-    return datetime.strptime(value, "%m/%d/%y").strftime("%Y-%m-%d")
-
-with open("data.csv", "r", encoding="utf-8") as file:
-    reader = csv.DictReader(file)
-
-    for row in reader:
-
-        safety_stock = row["Safety Stock (Bener Gasih?)"].replace(",", ".")
-
-        sql = """
-            INSERT INTO transactions (
-                transaction_code, date, item_id, item_name, category_name,
-                current_stock, stock_awal, qty_in, qty_out, target_stock,
-                bulan, safety_stock, restock_flag, restock_qty
+"""
+Import data.csv ke tabel transaction lewat engine yang dikonfigurasi
+(DATABASE_URL, atau --database-url; SQLite juga bisa).
+
+CSV dibaca per chunk, dibersihkan secara vektor (pandas), lalu di-insert
+dengan Core executemany. Tiap chunk di-commit dan posisinya dicatat di file
+checkpoint, jadi kalau import terputus tinggal dijalankan lagi dan akan
+lanjut dari chunk terakhir. Transaction ID yang sudah ada (di DB atau
+dobel di CSV) dilewati.
+
+    python -m app.import_csv data.csv --chunk-size 5000
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from . import analytics_summary, models
+from .backfill_dates import ensure_tx_date_column
+from .database import Base, engine as default_engine
+from .date_utils import DATE_FORMATS
+from .response_cache import bump_version
+
+
+# kolom CSV -> atribut model Transaction ("Bulan" & kolom kosong di ujung diabaikan)
+CSV_COLUMNS = {
+    "Transaction ID": "transaction_id",
+    "Date": "date",
+    "Item ID": "item_id",
+    "Item Name": "item_name",
+    "Category Name": "category_name",
+    "Stock Awal": "stock_awal",
+    "Current Stock": "stock_current",
+    "IN": "qty_in",
+    "OUT": "qty_out",
+    "Target Stock": "target_stock",
+    "Safety Stock (Bener Gasih?)": "safety_stock",
+    "Restock (YES/NO)": "restock_flag",
+    "Restock": "restock",
+}
+INT_COLUMNS = ["stock_awal", "stock_current", "qty_in", "qty_out", "target_stock", "restock"]
+TEXT_COLUMNS = ["transaction_id", "date", "item_id", "item_name", "category_name", "restock_flag"]
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Versi vektor date_utils.parse_date_str: coba DATE_FORMATS berurutan."""
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+    return parsed.dt.date
+
+
+def clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    df = chunk.rename(columns=CSV_COLUMNS)
+
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].str.strip()
+        df[col] = df[col].mask(df[col] == "")
+    for col in INT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    # Safety Stock pakai koma desimal ("12,5")
+    df["safety_stock"] = pd.to_numeric(df["safety_stock"].str.replace(",", ".", regex=False), errors="coerce")
+    df["tx_date"] = parse_dates(df["date"])
+
+    df = df[df["transaction_id"].notna()]
+    return df.drop_duplicates("transaction_id")
+
+
+def _to_rows(df: pd.DataFrame):
+    """DataFrame -> list dict dengan key nama kolom tabel, NaN/NA -> None."""
+    names = [getattr(models.Transaction, attr).property.columns[0].name for attr in df.columns]
+    # per kolom ke list Python (jauh lebih cepat daripada iterasi baris DataFrame)
+    columns = [col.astype(object).where(col.notna(), None).tolist() for _, col in df.items()]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _read_checkpoint(path: Path) -> int:
+    if not path.exists():
+        return 0
+    return json.loads(path.read_text())["rows_done"]
+
+
+def _write_checkpoint(path: Path, rows_done: int):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"rows_done": rows_done}))
+    os.replace(tmp, path)
+
+
+def import_csv(csv_path, bind=default_engine, chunk_size=5000, checkpoint_path=None, rebuild_summary=True):
+    csv_path = Path(csv_path)
+    checkpoint_path = Path(checkpoint_path or f"{csv_path}.checkpoint")
+
+    Base.metadata.create_all(bind=bind)
+    ensure_tx_date_column(bind)
+
+    tx = models.Transaction
+    table = tx.__table__
+    rows_done = _read_checkpoint(checkpoint_path)
+    if rows_done:
+        print(f"Lanjut dari checkpoint: {rows_done} baris CSV sudah diproses")
+
+    stats = {"read": 0, "inserted": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    reader = pd.read_csv(
+        csv_path,
+        dtype=str,
+        keep_default_na=False,
+        usecols=lambda c: c in CSV_COLUMNS,
+        skiprows=range(1, rows_done + 1),
+        chunksize=chunk_size,
+    )
+    for chunk in reader:
+        df = clean_chunk(chunk)
+
+        with bind.begin() as conn:
+            existing = set(
+                conn.execute(
+                    select(tx.transaction_id).where(tx.transaction_id.in_(df["transaction_id"].tolist()))
+                ).scalars()
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        data = (
-            row["Transaction ID"],
-            convert_date(row["Date"]),     # ← PENTING!!
-            row["Item ID"],
-            row["Item Name"],
-            row["Category Name"],
-            int(row["Current Stock"]),
-            int(row["Stock Awal"]),
-            int(row["IN"]),
-            int(row["OUT"]),
-            int(row["Target Stock"]),
-            row["Bulan"],
-            float(safety_stock),
-            row["Restock (YES/NO)"],
-            int(row["Restock"]),
-        )
-
-        cursor.execute(sql, data)
-
-db.commit()
-print("Data berhasil di-import!")
+            if existing:
+                df = df[~df["transaction_id"].isin(existing)]
+            if len(df):
+                conn.execute(insert(table), _to_rows(df))
+                bump_version(conn)
+
+        rows_done += len(chunk)
+        _write_checkpoint(checkpoint_path, rows_done)
+
+        stats["read"] += len(chunk)
+        stats["inserted"] += len(df)
+        stats["skipped"] += len(chunk) - len(df)
+        elapsed = time.perf_counter() - start
+        print(f"{rows_done} baris CSV, {stats['inserted']} masuk, {stats['skipped']} dilewati "
+              f"({stats['read'] / elapsed:.0f} baris/s)")
+
+    checkpoint_path.unlink(missing_ok=True)
+    stats["seconds"] = time.perf_counter() - start
+
+    # summary analytics tidak ikut ter-update oleh insert massal -> hitung ulang
+    if rebuild_summary and stats["inserted"]:
+        with Session(bind=bind) as db:
+            analytics_summary.rebuild(db)
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv_path", nargs="?", default="data.csv")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--checkpoint", help="file checkpoint (default: <csv>.checkpoint)")
+    parser.add_argument("--database-url", help="override DATABASE_URL")
+    parser.add_argument("--no-summary", action="store_true", help="jangan rebuild summary analytics")
+    args = parser.parse_args()
+
+    bind = create_engine(args.database_url) if args.database_url else default_engine
+    stats = import_csv(
+        args.csv_path,
+        bind=bind,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        rebuild_summary=not args.no_summary,
+    )
+    rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0
+    print(f"Import selesai: {stats['inserted']} baris masuk, {stats['skipped']} dilewati, "
+          f"{stats['seconds']:.1f}s ({rate:.0f} baris/s)")
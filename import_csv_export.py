@@ -1,28 +1,138 @@
+"""
+Export join Transaction / Item / Category ke CSV (atau Parquet).
+
+Hasil query dibaca per chunk (yield_per) dan langsung ditulis ke file, jadi
+memori tidak ikut membesar dengan ukuran tabel. Output CSV sama persis
+(byte per byte) dengan versi lama yang membangun satu DataFrame penuh.
+
+    python import_csv_export.py --start 2024-01-01 --end 2024-03-31
+    python import_csv_export.py --format parquet --output export_data.parquet
+"""
+import argparse
+import time
+from datetime import date
+
 import pandas as pd
+from sqlalchemy import func
+
 from backend.db import SessionLocal
 from backend.models import Category, Item, Transaction
 
-db = SessionLocal()
-
-query = db.query(
-    Transaction.date,
-    Item.item_code.label("Item ID"),
-    Item.name.label("Item Name"),
-    Category.name.label("Category Name"),
-    Transaction.stock_after.label("Current Stock"),
-    Transaction.stock_before.label("Stock Awal"),
-    Transaction.qty_in.label("IN"),
-    Transaction.qty_out.label("OUT"),
-    Item.target_stock.label("Target Stock"),
-    Transaction.id  # ID transaksi
-).join(Item, Transaction.item_id == Item.id)\
- .join(Category, Item.category_id == Category.id)
-
-df = pd.DataFrame(query.all(), columns=[
-    "Date","Item ID","Item Name","Category Name","Current Stock","Stock Awal",
-    "IN","OUT","Target Stock","ID"
-])
-
-df.to_csv("export_data.csv", index=False)
-print("✅ Data berhasil diexport ke export_data.csv")
-db.close()
+
+COLUMNS = [
+    "Date", "Item ID", "Item Name", "Category Name", "Current Stock", "Stock Awal",
+    "IN", "OUT", "Target Stock", "ID",
+]
+INT_COLUMNS = ["Current Stock", "Stock Awal", "IN", "OUT", "Target Stock", "ID"]
+
+
+def build_query(db, start=None, end=None):
+    query = db.query(
+        Transaction.date,
+        Item.item_code.label("Item ID"),
+        Item.name.label("Item Name"),
+        Category.name.label("Category Name"),
+        Transaction.stock_after.label("Current Stock"),
+        Transaction.stock_before.label("Stock Awal"),
+        Transaction.qty_in.label("IN"),
+        Transaction.qty_out.label("OUT"),
+        Item.target_stock.label("Target Stock"),
+        Transaction.id  # ID transaksi
+    ).join(Item, Transaction.item_id == Item.id)\
+     .join(Category, Item.category_id == Category.id)
+
+    if start is not None:
+        query = query.filter(Transaction.date >= start)
+    if end is not None:
+        query = query.filter(Transaction.date <= end)
+    return query
+
+
+def count_rows(db, query):
+    """
+    Jumlah baris + kolom int yang punya NULL. DataFrame penuh (versi lama)
+    men-cast kolom int ber-NULL ke float ("500.0") di SEMUA baris, jadi tiap
+    chunk harus diformat dengan cara yang sama.
+    """
+    sub = query.subquery()
+    total, *non_null = db.query(func.count(), *(func.count(c) for c in sub.c)).one()
+    nullable = [name for name, n in zip(COLUMNS, non_null) if name in INT_COLUMNS and n < total]
+    return total, nullable
+
+
+def _chunks(db, query, chunk_size):
+    result = db.execute(query.statement, execution_options={"yield_per": chunk_size})
+    yield from result.partitions()
+
+
+def _progress(written, total, start):
+    elapsed = time.perf_counter() - start
+    pct = f" ({written / total:.0%})" if total else ""
+    rate = written / elapsed if elapsed else 0
+    print(f"{written}/{total} baris{pct}, {rate:.0f} baris/s")
+
+
+def write_csv(db, query, path, total, nullable, chunk_size):
+    start = time.perf_counter()
+    written = 0
+    # newline="" + lineterminator default pandas = sama dengan df.to_csv(path)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        pd.DataFrame(columns=COLUMNS).to_csv(f, index=False)
+        for rows in _chunks(db, query, chunk_size):
+            df = pd.DataFrame(rows, columns=COLUMNS)
+            for col in nullable:
+                df[col] = df[col].astype(float)
+            df.to_csv(f, index=False, header=False)
+            written += len(rows)
+            _progress(written, total, start)
+    return written
+
+
+def write_parquet(db, query, path, total, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [("Date", pa.date32())]
+        + [(name, pa.string()) for name in ("Item ID", "Item Name", "Category Name")]
+        + [(name, pa.int64()) for name in INT_COLUMNS]
+    )
+    start = time.perf_counter()
+    written = 0
+    # satu row group per chunk, ditulis langsung ke file
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in _chunks(db, query, chunk_size):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            written += len(rows)
+            _progress(written, total, start)
+    return written
+
+
+def export(path, fmt="csv", start=None, end=None, chunk_size=10_000, session_factory=SessionLocal):
+    db = session_factory()
+    try:
+        query = build_query(db, start, end)
+        total, nullable = count_rows(db, query)
+        if fmt == "parquet":
+            return write_parquet(db, query, path, total, chunk_size)
+        return write_csv(db, query, path, total, nullable, chunk_size)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="default: export_data.csv / export_data.parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--start", type=date.fromisoformat, help="tanggal awal (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="tanggal akhir (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    output = args.output or f"export_data.{args.format}"
+    export(output, args.format, args.start, args.end, args.chunk_size)
+    print(f"✅ Data berhasil diexport ke {output}")
@@ -1,15 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from .database import engine, Base
-from .routers import categories, transaction, analytics, analytics_category, data_uas_router
+from .config import settings
+from .database import engine, Base, init_db
+from .routers import categories, transaction, analytics, analytics_category, data_uas_router, cache, admin
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # buat tabel yang belum ada, lalu isi summary yang masih kosong (DB lama)
+    # sebelum melayani request
+    init_db()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def _router(module):
+    # DB_MODE=async -> endpoint dijalankan lewat AsyncSession (lihat async_routes.py)
+    if settings.DB_MODE == "async":
+        from .async_routes import asyncify_router
+        return asyncify_router(module.router)
+    return module.router
 
-app = FastAPI()
 
 # Categories -> pakai prefix dari router saja
-app.include_router(categories.router)
+app.include_router(_router(categories))
 
 # Transaction / lainnya -> sama, jangan didobel prefix lagi
-app.include_router(data_uas_router.router)
-app.include_router(transaction.router)
-app.include_router(analytics.router)
-app.include_router(analytics_category.router)
-
+app.include_router(_router(data_uas_router))
+app.include_router(_router(transaction))
+app.include_router(_router(analytics))
+app.include_router(_router(analytics_category))
+app.include_router(cache.router)
+app.include_router(admin.router)
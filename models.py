@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from sqlalchemy.orm import validates
 from .database import Base
+from .date_utils import parse_date_str
 
 class Category(Base):
     __tablename__ = "categories"
@@ -10,6 +12,11 @@ class Category(Base):
 
 class Transaction(Base):
     __tablename__ = "transaction"
+    __table_args__ = (
+        # filter item / kategori + rentang tanggal di endpoint analytics
+        Index("ix_transaction_item_tx_date", "Item ID", "Tx Date"),
+        Index("ix_transaction_category_tx_date", "Category Name", "Tx Date"),
+    )
 
     transaction_id = Column("Transaction ID", String(20), primary_key=True, index=True)
     date           = Column("Date", String(20), index=True)
@@ -29,6 +36,14 @@ class Transaction(Base):
     restock_flag   = Column("Restock YES", String(10), nullable=True)
     restock        = Column("Restock", Integer, nullable=True)
 
+    # Date asli (string) dalam bentuk DATE beneran, dipakai analytics untuk
+    # filter / group / order di SQL. Baris lama diisi lewat backfill_dates.py
+    tx_date        = Column("Tx Date", Date, index=True, nullable=True)
+
+    @validates("date")
+    def _sync_tx_date(self, key, value):
+        self.tx_date = parse_date_str(value) if value else None
+        return value
 
 
 class Item(Base):
@@ -38,3 +53,60 @@ class Item(Base):
     item_code     = Column("Item ID", String(20), unique=True, index=True)
     item_name     = Column("Item Name", String(100))
     category_name = Column("Category Name", String(50))
+
+
+# ---------------------------------------------------------
+# SUMMARY TABLES (diupdate bareng tulis transaksi, lihat analytics_summary.py)
+# Key NULL disimpan sebagai "" supaya bisa jadi primary key; router membacanya
+# kembali sebagai NULL lewat analytics_summary.unkey.
+# ---------------------------------------------------------
+class ItemSummary(Base):
+    __tablename__ = "summary_item"
+
+    item_id           = Column(String(20), primary_key=True)
+    item_name         = Column(String(100), primary_key=True)
+    row_count         = Column(Integer, nullable=False, default=0)
+    active_count      = Column(Integer, nullable=False, default=0)   # IN > 0 atau OUT > 0
+    total_in          = Column(Integer, nullable=False, default=0)
+    total_out         = Column(Integer, nullable=False, default=0)
+    min_stock_awal    = Column(Integer, nullable=True)
+    max_stock_current = Column(Integer, nullable=True)
+
+
+class CategorySummary(Base):
+    __tablename__ = "summary_category"
+
+    category_name = Column(String(50), primary_key=True)
+    row_count     = Column(Integer, nullable=False, default=0)
+    total_in      = Column(Integer, nullable=False, default=0)
+    total_out     = Column(Integer, nullable=False, default=0)
+    restock_count = Column(Integer, nullable=False, default=0)   # Restock YES = 'YES'
+
+
+class MonthOutSummary(Base):
+    __tablename__ = "summary_month_out"
+
+    item_id       = Column(String(20), primary_key=True)
+    category_name = Column(String(50), primary_key=True)
+    year          = Column(Integer, primary_key=True)
+    month         = Column(Integer, primary_key=True)
+    total_out     = Column(Integer, nullable=False, default=0)
+
+
+class ActiveDateSummary(Base):
+    __tablename__ = "summary_active_date"
+
+    tx_date   = Column(Date, primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+
+
+# ---------------------------------------------------------
+# DATA VERSION (satu baris, id = 1): naik di transaksi yang sama dengan
+# setiap write transaksi, dibaca per request oleh cache response analytics
+# supaya semua worker melihat write dari worker / script lain.
+# ---------------------------------------------------------
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    id      = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,33 @@
+"""
+Keyset pagination untuk endpoint list.
+
+Halaman berikutnya diambil dengan `WHERE pk > after ORDER BY pk LIMIT n`,
+jadi biaya & memori per request tetap (tidak pakai OFFSET). Body response
+tetap berupa list; info halaman dikirim lewat header:
+
+    X-Next-Cursor  nilai `after` untuk halaman berikutnya (tidak ada = halaman terakhir)
+    X-Total-Count  jumlah baris yang cocok dengan filter (kalau with_total=true)
+"""
+from fastapi import Query, Response
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+LimitParam = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT)
+
+
+def paginate(query, key, after, limit, response: Response, with_total=True):
+    """Jalankan `query` (sudah difilter) satu halaman, urut berdasarkan kolom `key`."""
+    if with_total:
+        response.headers["X-Total-Count"] = str(query.order_by(None).count())
+
+    if after is not None:
+        query = query.filter(key > after)
+
+    # ambil 1 baris lebih untuk tahu masih ada halaman berikutnya atau tidak
+    rows = query.order_by(key).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(getattr(rows[-1], key.key))
+
+    return rows
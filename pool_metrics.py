@@ -0,0 +1,107 @@
+"""
+Metrik connection pool SQLAlchemy.
+
+Dicatat lewat event hook engine (do_connect / connect / checkout / checkin /
+invalidate). Waktu tunggu checkout tidak punya event sendiri, jadi pool-nya
+memakai subclass QueuePool (pool_class()) yang mengukur _do_get saat pool
+sedang penuh (semua koneksi + overflow terpakai).
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.connect_time_total = 0.0
+        self.connect_time_max = 0.0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+        self._engine = None
+
+    # ---- pool subclass untuk waktu tunggu ----
+    def pool_class(self, base):
+        metrics = self
+
+        def _do_get(pool):
+            exhausted = (
+                pool._pool.empty()
+                and pool._max_overflow > -1
+                and pool._overflow >= pool._max_overflow
+            )
+            start = time.perf_counter()
+            try:
+                return base._do_get(pool)
+            except exc.TimeoutError:
+                with metrics._lock:
+                    metrics.timeouts += 1
+                raise
+            finally:
+                if exhausted:
+                    metrics._record_wait(time.perf_counter() - start)
+
+        return type(f"Metered{base.__name__}", (base,), {"_do_get": _do_get})
+
+    def _record_wait(self, elapsed):
+        with self._lock:
+            self.waits += 1
+            self.wait_time_total += elapsed
+            self.wait_time_max = max(self.wait_time_max, elapsed)
+
+    # ---- event hook ----
+    def attach(self, engine):
+        """Daftarkan event ke engine sync (untuk AsyncEngine: async_engine.sync_engine)."""
+        self._engine = engine
+        event.listen(engine, "do_connect", self._on_do_connect)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_do_connect(self, dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_start"] = time.perf_counter()
+
+    def _on_connect(self, dbapi_conn, conn_rec):
+        start = conn_rec.info.pop("connect_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.connects += 1
+            self.connect_time_total += elapsed
+            self.connect_time_max = max(self.connect_time_max, elapsed)
+
+    def _on_checkout(self, dbapi_conn, conn_rec, conn_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_conn, conn_rec, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "connect_ms_avg": self.connect_time_total / self.connects * 1000 if self.connects else None,
+                "connect_ms_max": self.connect_time_max * 1000,
+                "waits": self.waits,
+                "wait_ms_avg": self.wait_time_total / self.waits * 1000 if self.waits else None,
+                "wait_ms_max": self.wait_time_max * 1000,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+            }
+        # angka sesaat langsung dari pool (hanya ada di QueuePool)
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            data[name] = getattr(pool, name)() if isinstance(pool, QueuePool) else None
+        return data
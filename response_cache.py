@@ -0,0 +1,238 @@
+"""
+Cache response GET untuk router analytics.
+
+Entry di-key dengan path + query string dan ditandai dengan data version.
+Data version disimpan di tabel data_version (satu baris) dan dinaikkan
+bump_version(db) di transaksi DB yang sama dengan write-nya, jadi write
+dari worker uvicorn lain atau script import juga membuat entry basi.
+Versi itu dibaca lewat primary key paling sering sekali per
+`version_interval` detik (ANALYTICS_CACHE_VERSION_MS); di antaranya cache
+hit dijawab tanpa menyentuh DB. Write lewat Session di proses ini memaksa
+baca ulang segera setelah commit. Response dikirim dengan ETag; request
+dengan If-None-Match yang cocok dijawab 304.
+
+Entry juga kedaluwarsa setelah `ttl` detik (ANALYTICS_CACHE_TTL), batas
+atas untuk write yang tidak lewat bump_version (mis. SQL manual).
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .database import get_async_db, get_db
+
+
+class _Entry(NamedTuple):
+    version: int
+    body: bytes
+    media_type: str
+    etag: str
+    expires: float
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl=60.0, version_interval=0.5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_interval = version_interval
+        # versi terakhir yang dilihat proses ini & kapan dibaca dari DB
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._checked_at = None
+        self._expired_at = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version_due(self):
+        """True kalau versi perlu dibaca ulang dari DB."""
+        with self._lock:
+            return self._checked_at is None or time.monotonic() - self._checked_at >= self.version_interval
+
+    def expire_version(self):
+        """Paksa request berikutnya membaca versi dari DB (setelah commit write)."""
+        with self._lock:
+            self._checked_at = None
+            self._expired_at = time.monotonic()
+
+    def observe(self, version, read_at):
+        """Catat versi yang dibaca dari DB pada `read_at`; kalau berubah, entry lama dibuang."""
+        with self._lock:
+            if read_at < self._expired_at:
+                # ada commit setelah pembacaan ini dimulai -> hasilnya mungkin sudah lama
+                return
+            self._checked_at = read_at
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body, media_type):
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        entry = _Entry(version, body, media_type, f'"{version}-{digest}"', time.monotonic() + self.ttl)
+        with self._lock:
+            # data sudah berubah selama handler jalan -> jangan simpan hasil lama
+            if version != self.version:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "version_interval": self.version_interval,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else None,
+            }
+
+
+cache = ResponseCache(
+    int(os.getenv("ANALYTICS_CACHE_SIZE", "256")),
+    float(os.getenv("ANALYTICS_CACHE_TTL", "60")),
+    int(os.getenv("ANALYTICS_CACHE_VERSION_MS", "500")) / 1000,
+)
+
+DATA_VERSION_ID = 1
+# flag di Session.info: transaksi ini menaikkan data version
+_BUMPED = "response_cache_bumped"
+
+
+def _version_query():
+    table = models.DataVersion.__table__
+    return select(table.c.version).where(table.c.id == DATA_VERSION_ID)
+
+
+def read_version(db):
+    """Data version bersama (0 kalau belum pernah ada write)."""
+    return db.execute(_version_query()).scalar() or 0
+
+
+def bump_version(db):
+    """
+    Naikkan data version di transaksi `db` (Session atau Connection).
+    Panggil sebelum commit write transaksi, commit oleh caller.
+    """
+    if isinstance(db, Session):
+        db.info[_BUMPED] = True
+    table = models.DataVersion.__table__
+    bump = update(table).where(table.c.id == DATA_VERSION_ID).values(version=table.c.version + 1)
+    if db.execute(bump).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(table).values(id=DATA_VERSION_ID, version=1))
+    except IntegrityError:
+        # baris baru saja dibuat oleh worker lain
+        db.execute(bump)
+
+
+@event.listens_for(Session, "after_commit")
+def _expire_committed(session):
+    if session.info.pop(_BUMPED, False):
+        cache.expire_version()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_bump(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_BUMPED, None)
+
+
+def _sync_version(request):
+    # pakai get_db yang sama dengan handler (termasuk dependency_overrides)
+    get_session = request.app.dependency_overrides.get(get_db, get_db)
+    sessions = get_session()
+    db = next(sessions)
+    try:
+        return read_version(db)
+    finally:
+        sessions.close()
+
+
+async def _current_version(request):
+    if settings.DB_MODE != "async":
+        return await run_in_threadpool(_sync_version, request)
+    get_session = request.app.dependency_overrides.get(get_async_db, get_async_db)
+    sessions = get_session()
+    db = await anext(sessions)
+    try:
+        return (await db.execute(_version_query())).scalar() or 0
+    finally:
+        await sessions.aclose()
+
+
+def _etag_matches(header, etag):
+    if header is None:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class CachedRoute(APIRoute):
+    """route_class untuk APIRouter: cache response GET 200 di `cache`."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if self.methods != {"GET"}:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+            # versi diambil sebelum handler jalan, supaya write di tengah jalan
+            # membuat hasil ini tidak dipakai ulang
+            if cache.version_due():
+                read_at = time.monotonic()
+                version = await _current_version(request)
+                cache.observe(version, read_at)
+            else:
+                version = cache.version
+            entry = cache.get(key, version)
+
+            if entry is None:
+                response = await handler(request)
+                if response.status_code != 200:
+                    return response
+                entry = cache.put(key, version, response.body, response.media_type)
+
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+            if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+                return Response(status_code=304, headers=headers)
+            return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+        return cached_handler
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+
+from .. import database
+from ..config import settings
+from ..dependencies import require_admin
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/pool")
+def pool_stats():
+    """Setting & metrik connection pool (lihat pool_metrics.py)."""
+    return {
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        },
+        "sync": database.pool_metrics.snapshot(),
+        "async": database.async_pool_metrics.snapshot() if database.async_pool_metrics else None,
+    }
@@ -1,45 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from collections import defaultdict
-from typing import Dict, List
-from datetime import datetime, date
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, case, cast, select, Float
+from typing import Dict, List, Optional
+from datetime import date
 
 from ..database import get_db
 from .. import models
+from ..analytics_summary import unkey
+from ..response_cache import CachedRoute
+from ..date_utils import year_month, days_between
 
 router = APIRouter(
     prefix="/analytics",
-    tags=["Analytics"]
+    tags=["Analytics"],
+    route_class=CachedRoute,
 )
-def parse_date_str(d: str) -> date | None:
-    for fmt in ("%Y-%m-%d", "%m/%d/%y", "%d/%m/%y"):
-        try:
-            return datetime.strptime(d, fmt).date()
-        except ValueError:
-            continue
-    return None
 
 # ---------------------------------------------------------
 # 1. Rata-rata frekuensi transaksi setiap barang per hari
 # ---------------------------------------------------------
 @router.get("/avg-frequency", response_model=List[Dict])
 def avg_frequency_per_item(db: Session = Depends(get_db)):
-    total_days = db.query(
-        func.count(func.distinct(models.Transaction.date))
-    ).scalar() or 1
+    # dibaca dari summary table (lihat analytics_summary.py), bukan scan tabel transaction
+    total_days = db.query(func.count(models.ActiveDateSummary.tx_date)).scalar() or 1
 
     rows = (
         db.query(
-            models.Transaction.item_id,
-            models.Transaction.item_name,
-            func.count(models.Transaction.transaction_id).label("total_transaksi"),
+            unkey(models.ItemSummary.item_id).label("item_id"),
+            unkey(models.ItemSummary.item_name).label("item_name"),
+            models.ItemSummary.active_count.label("total_transaksi"),
         )
-        .filter(
-            (models.Transaction.qty_in > 0) |
-            (models.Transaction.qty_out > 0)
-        )
-        .group_by(models.Transaction.item_id, models.Transaction.item_name)
+        .filter(models.ItemSummary.active_count > 0)
+        .order_by(models.ItemSummary.item_id, models.ItemSummary.item_name)
         .all()
     )
 
@@ -63,90 +55,124 @@ def avg_frequency_per_item(db: Session = Depends(get_db)):
 # ---------------------------------------------------------
 @router.get("/avg-restock-time", response_model=List[Dict])
 def avg_restock_time(db: Session = Depends(get_db)):
-    rows = (
-        db.query(
-            models.Transaction.item_id,
-            models.Transaction.item_name,
-            models.Transaction.date,
-        )
-        .filter(models.Transaction.qty_in > 0)
-        .order_by(models.Transaction.item_id, models.Transaction.date)
-        .all()
-    )
-
-    # group hanya per item_id
-    per_item_dates: dict[str, list[str]] = defaultdict(list)
-    per_item_name: dict[str, str] = {}
-
-    for r in rows:
-        if r.item_id not in per_item_name:
-            # simpan nama pertama yang ketemu (boleh juga dibikin .title() / .lower())
-            per_item_name[r.item_id] = r.item_name
-        per_item_dates[r.item_id].append(r.date)
-
-    data: List[Dict] = []
+    """
+    Rata-rata selisih hari antar restock per item, dihitung di database.
 
-    for item_id, date_strs in per_item_dates.items():
-        parsed_dates: List[date] = []
-        for d in date_strs:
-            parsed = parse_date_str(d)
-            if parsed is not None:
-                parsed_dates.append(parsed)
+    Rata-rata selisih berurutan d2-d1, d3-d2, ..., dn-d(n-1) menyusut jadi
+    (dn - d1) / (n - 1), jadi cukup MIN / MAX / COUNT per item tanpa LAG()
+    atau window function (jalan juga di SQLite lama & MySQL 5.7).
+    """
+    tx = models.Transaction
+    dialect = db.get_bind().dialect
 
+    per_item = (
+        db.query(
+            tx.item_id.label("item_id"),
+            func.min(tx.tx_date).label("first_date"),
+            func.max(tx.tx_date).label("last_date"),
+            func.count().label("restock_count"),
+        )
+        .filter(
+            tx.qty_in > 0,
+            tx.tx_date.isnot(None),
+        )
+        .group_by(tx.item_id)
         # kalau restock cuma 0–1 kali, SKIP aja (jangan tampil)
-        if len(parsed_dates) < 2:
-            continue
-
-        parsed_dates.sort()
-        diffs = [
-            (parsed_dates[i] - parsed_dates[i - 1]).days
-            for i in range(1, len(parsed_dates))
-        ]
-        avg_days = sum(diffs) / len(diffs) if diffs else None
+        .having(func.count() > 1)
+        .subquery()
+    )
 
-        data.append(
-            {
-                "item_id": item_id,
-                "item_name": per_item_name[item_id],
-                "avg_restock_days": avg_days,
-            }
+    # nama item diambil dari restock paling awal (lookup index Item ID + Tx Date)
+    first = aliased(tx)
+    first_name = (
+        select(first.item_name)
+        .where(
+            first.item_id == per_item.c.item_id,
+            first.qty_in > 0,
+            first.tx_date == per_item.c.first_date,
         )
+        .order_by(first.transaction_id)
+        .limit(1)
+        .scalar_subquery()
+    )
 
-    return data
-
-# ---------------------------------------------------------
-# 3. Tren jumlah barang keluar per bulan
-# ---------------------------------------------------------
-@router.get("/trend-out", response_model=List[Dict])
-def trend_out_per_bulan(db: Session = Depends(get_db)):
-    # kolom "Bulan" sudah tidak ada → hitung bulan dari Date
+    span_days = cast(days_between(per_item.c.last_date, per_item.c.first_date, dialect), Float)
     rows = (
         db.query(
-            models.Transaction.date,
-            models.Transaction.qty_out,
+            per_item.c.item_id,
+            first_name.label("item_name"),
+            (span_days / (per_item.c.restock_count - 1)).label("avg_restock_days"),
         )
-        .filter(models.Transaction.qty_out > 0)
+        .order_by(per_item.c.item_id)
         .all()
     )
 
-    per_bulan: dict[str, int] = defaultdict(int)
+    return [
+        {
+            "item_id": r.item_id,
+            "item_name": r.item_name,
+            "avg_restock_days": float(r.avg_restock_days),
+        }
+        for r in rows
+    ]
 
-    for r in rows:
-        dt = parse_date_str(r.date)
-        if dt is None:
-            continue
-        label = dt.strftime("%b-%Y")  # contoh: "Jan-2024"
-        per_bulan[label] += r.qty_out or 0
-
-    # sort by bulan (pakai parsing ulang label)
-    hasil = [
-        {"bulan": k, "total_out": v}
-        for k, v in sorted(
-            per_bulan.items(),
-            key=lambda kv: datetime.strptime(kv[0], "%b-%Y")
+# ---------------------------------------------------------
+# 3. Tren jumlah barang keluar per bulan
+# ---------------------------------------------------------
+@router.get("/trend-out", response_model=List[Dict])
+def trend_out_per_bulan(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    item_id: Optional[str] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    if start is None and end is None:
+        # tanpa filter tanggal cukup dari summary per item / kategori / bulan
+        summary = models.MonthOutSummary
+        query = db.query(
+            summary.year.label("year"),
+            summary.month.label("month"),
+            func.sum(summary.total_out).label("total_out"),
+        )
+        if item_id is not None:
+            query = query.filter(summary.item_id == item_id)
+        if category is not None:
+            query = query.filter(summary.category_name == category)
+        rows = query.group_by(summary.year, summary.month).order_by(summary.year, summary.month).all()
+    else:
+        # bucket bulan + SUM dikerjakan di database, Python hanya format label
+        year, month = year_month(models.Transaction.tx_date)
+        query = (
+            db.query(
+                year.label("year"),
+                month.label("month"),
+                func.sum(models.Transaction.qty_out).label("total_out"),
+            )
+            .filter(
+                models.Transaction.qty_out > 0,
+                models.Transaction.tx_date.isnot(None),
+            )
         )
+
+        if start is not None:
+            query = query.filter(models.Transaction.tx_date >= start)
+        if end is not None:
+            query = query.filter(models.Transaction.tx_date <= end)
+        if item_id is not None:
+            query = query.filter(models.Transaction.item_id == item_id)
+        if category is not None:
+            query = query.filter(models.Transaction.category_name == category)
+
+        rows = query.group_by(year, month).order_by(year, month).all()
+
+    return [
+        {
+            "bulan": date(int(r.year), int(r.month), 1).strftime("%b-%Y"),  # contoh: "Jan-2024"
+            "total_out": r.total_out,
+        }
+        for r in rows
     ]
-    return hasil
 
 
 # ---------------------------------------------------------
@@ -155,16 +181,16 @@ def trend_out_per_bulan(db: Session = Depends(get_db)):
 @router.get("/turnover-ratio")
 def turnover_ratio(db: Session = Depends(get_db)):
     total_out = float(
-        db.query(func.sum(models.Transaction.qty_out)).scalar() or 0
+        db.query(func.sum(models.CategorySummary.total_out)).scalar() or 0
     )
 
     sub = (
         db.query(
-            models.Transaction.item_id.label("item_id"),
-            func.min(models.Transaction.stock_awal).label("stock_awal"),
-            func.max(models.Transaction.stock_current).label("stock_current"),
+            models.ItemSummary.item_id.label("item_id"),
+            func.min(models.ItemSummary.min_stock_awal).label("stock_awal"),
+            func.max(models.ItemSummary.max_stock_current).label("stock_current"),
         )
-        .group_by(models.Transaction.item_id)
+        .group_by(models.ItemSummary.item_id)
         .subquery()
     )
 
@@ -188,12 +214,12 @@ def turnover_ratio(db: Session = Depends(get_db)):
 # ---------------------------------------------------------
 @router.get("/in-out-ratio", response_model=Dict)
 def in_out_ratio(db: Session = Depends(get_db)):
-    total_in = float(
-        db.query(func.sum(models.Transaction.qty_in)).scalar() or 0
-    )
-    total_out = float(
-        db.query(func.sum(models.Transaction.qty_out)).scalar() or 0
-    )
+    total_in, total_out = db.query(
+        func.sum(models.CategorySummary.total_in),
+        func.sum(models.CategorySummary.total_out),
+    ).one()
+    total_in = float(total_in or 0)
+    total_out = float(total_out or 0)
 
     ratio_out_over_in = (total_out / total_in) if total_in else None
 
@@ -213,34 +239,31 @@ def restock_forecast(
     days_ahead: int = 30,
     db: Session = Depends(get_db),
 ):
-    rows = (
+    total_rows, first_date, last_date, total_out = (
         db.query(
-            models.Transaction.date,
-            models.Transaction.qty_out,
+            func.count(models.Transaction.transaction_id),
+            func.min(models.Transaction.tx_date),
+            func.max(models.Transaction.tx_date),
+            # OUT hanya dihitung dari baris yang tanggalnya valid
+            func.sum(
+                case(
+                    (models.Transaction.tx_date.isnot(None), models.Transaction.qty_out),
+                    else_=0,
+                )
+            ),
         )
         .filter(models.Transaction.item_id == item_id)
-        .order_by(models.Transaction.date)
-        .all()
+        .one()
     )
 
-    if not rows:
+    if not total_rows:
         return {"item_id": item_id, "message": "Data tidak ditemukan"}
 
-    parsed_dates: List[date] = []
-    total_out = 0
-
-    for r in rows:
-        d = parse_date_str(r.date)
-        if d is None:
-            continue
-        parsed_dates.append(d)
-        total_out += r.qty_out or 0
-
-    if not parsed_dates:
+    if first_date is None:
         return {"item_id": item_id, "message": "Tanggal tidak bisa diparse"}
 
-    parsed_dates.sort()
-    total_days = (parsed_dates[-1] - parsed_dates[0]).days + 1
+    total_out = total_out or 0
+    total_days = (last_date - first_date).days + 1
 
     avg_out_per_day = total_out / total_days if total_days > 0 else 0
     forecast_qty = avg_out_per_day * days_ahead
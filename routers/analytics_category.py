@@ -5,10 +5,13 @@ from typing import List, Dict
 
 from ..database import get_db
 from .. import models
+from ..analytics_summary import unkey
+from ..response_cache import CachedRoute
 
 router = APIRouter(
     prefix="/analytics",
     tags=["Analytics Category"],
+    route_class=CachedRoute,
 )
 
 # ---------------------------------------------------------
@@ -18,25 +21,25 @@ router = APIRouter(
 def out_trend(db: Session = Depends(get_db)):
     """
     Tren total OUT per kategori per bulan.
-    Bulan diambil dari kolom Date ('2024-01-01' -> '2024-01').
+    Dibaca dari summary per item / kategori / bulan (lihat analytics_summary.py).
     """
+    summary = models.MonthOutSummary
     rows = (
         db.query(
-            models.Transaction.category_name.label("category"),
-            # ambil 'YYYY-MM' dari 'YYYY-MM-DD'
-            func.substr(models.Transaction.date, 1, 7).label("month"),
-            func.sum(models.Transaction.qty_out).label("total_out"),
+            unkey(summary.category_name).label("category"),
+            summary.year.label("year"),
+            summary.month.label("month"),
+            func.sum(summary.total_out).label("total_out"),
         )
-        .filter(models.Transaction.qty_out > 0)
-        .group_by("category", "month")
-        .order_by("category", "month")
+        .group_by(summary.category_name, summary.year, summary.month)
+        .order_by(summary.category_name, summary.year, summary.month)
         .all()
     )
 
     return [
         {
             "category": r.category,
-            "month": r.month,
+            "month": f"{int(r.year):04d}-{int(r.month):02d}",
             "total_out": r.total_out,
         }
         for r in rows
@@ -54,12 +57,11 @@ def restock_frequency(db: Session = Depends(get_db)):
     """
     rows = (
         db.query(
-            models.Transaction.category_name.label("category"),
-            func.count(models.Transaction.transaction_id).label("restock_count"),
+            unkey(models.CategorySummary.category_name).label("category"),
+            models.CategorySummary.restock_count,
         )
-        .filter(models.Transaction.restock_flag == "YES")
-        .group_by(models.Transaction.category_name)
-        .order_by(models.Transaction.category_name)
+        .filter(models.CategorySummary.restock_count > 0)
+        .order_by(models.CategorySummary.category_name)
         .all()
     )
 
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..dependencies import require_admin
+from ..response_cache import bump_version, cache
+
+router = APIRouter(prefix="/cache", tags=["Cache"])
+
+
+@router.get("/stats")
+def cache_stats():
+    """Hit / miss counter cache response analytics."""
+    return cache.stats()
+
+
+@router.post("/clear", dependencies=[Depends(require_admin)])
+def cache_clear(db: Session = Depends(get_db)):
+    # dipakai setelah write dari luar API (mis. SQL manual); versi bersama
+    # naik -> cache di semua worker ikut basi
+    bump_version(db)
+    db.commit()
+    cache.clear()
+    return {"status": "success", "message": "Cache cleared"}
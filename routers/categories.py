@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from .. import models
 from .. import schemas
-from ..database import get_db
+from ..database import get_db, insert_missing_categories
+from ..pagination import LimitParam, paginate
+from ..serialization import rows_response
 
 router = APIRouter(
     prefix="/categories",
@@ -27,8 +31,17 @@ def require_admin(role: str = Header(None, alias="X-User-Role")):
 # GET all categories
 # ----------------------------
 @router.get("/", response_model=list[schemas.CategoryOut])
-def get_all_categories(db: Session = Depends(get_db)):
-    return db.query(models.Category).all()
+def get_all_categories(
+    response: Response,
+    limit: int = LimitParam,
+    after: Optional[int] = None,
+    with_total: bool = True,
+    db: Session = Depends(get_db),
+):
+    # keyset di id (pagination.py), tuple kolom langsung di-encode (serialization.py)
+    query = db.query(models.Category.id, models.Category.name)
+    rows = paginate(query, models.Category.id, after, limit, response, with_total)
+    return rows_response(rows, ["id", "name"], response)
 
 
 # ----------------------------
@@ -123,38 +136,9 @@ def delete_category(
 def auto_fill_categories(db: Session = Depends(get_db)):
     """
     Isi tabel categories berdasarkan kolom 'Category Name' di tabel transaction.
-    Hanya menambah kategori yang belum ada.
+    Hanya menambah kategori yang belum ada (satu INSERT ... SELECT, lihat
+    database.insert_missing_categories).
     """
-    rows = (
-        db.query(models.Transaction.category_name)
-        .distinct()
-        .filter(models.Transaction.category_name.isnot(None))
-        .all()
-    )
-
-    created: list[models.Category] = []
-
-    for (name,) in rows:
-        if not name:
-            continue
-
-        cleaned_name = name.strip().lower()
-
-        existing = (
-            db.query(models.Category)
-            .filter(models.Category.name == cleaned_name)
-            .first()
-        )
-        if existing:
-            continue
-
-        new_cat = models.Category(name=cleaned_name)
-        db.add(new_cat)
-        created.append(new_cat)
-
+    created = insert_missing_categories(db, models)
     db.commit()
-
-    for cat in created:
-        db.refresh(cat)
-
-    return [{"id": c.id, "name": c.name} for c in created]
+    return [{"id": id_, "name": name} for id_, name in created]
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import models, schemas
 from ..dependencies import require_admin   # sama seperti di transaction/categories
+from ..pagination import LimitParam, paginate
+from ..serialization import rows_response
 
 # Tag & prefix biar di Swagger nggak "default"
 router = APIRouter(
@@ -11,15 +15,30 @@ router = APIRouter(
     tags=["Barang"]
 )
 
+# kolom list barang sebagai tuple (lihat serialization.py)
+ITEM_FIELDS = list(schemas.ItemOut.model_fields)
+ITEM_COLUMNS = [getattr(models.Item, f) for f in ITEM_FIELDS]
+
 # =========================
 # GET: semua barang
 # =========================
 @router.get("/", response_model=list[schemas.ItemOut])
-def get_all_barang(db: Session = Depends(get_db)):
+def get_all_barang(
+    response: Response,
+    limit: int = LimitParam,
+    after: Optional[int] = None,
+    category: Optional[str] = None,
+    with_total: bool = True,
+    db: Session = Depends(get_db),
+):
     """
-    Ambil semua barang dari tabel items.
+    Ambil barang dari tabel items per halaman (keyset di id, lihat pagination.py).
     """
-    return db.query(models.Item).all()
+    query = db.query(*ITEM_COLUMNS)
+    if category is not None:
+        query = query.filter(models.Item.category_name == category)
+    rows = paginate(query, models.Item.id, after, limit, response, with_total)
+    return rows_response(rows, ITEM_FIELDS, response)
 
 
 # =========================
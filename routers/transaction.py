@@ -1,12 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from datetime import date
+from functools import lru_cache
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from .. import models, schemas
-from ..database import get_db
+from .. import models, schemas, analytics_summary
+from ..database import get_db, get_async_db
+from ..response_cache import bump_version
+from ..date_utils import parse_date_str
 from ..dependencies import require_admin
+from ..pagination import LimitParam, paginate
+from ..serialization import loads, rows_response
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
-from sqlalchemy import text
+# kolom list / export = field TransactionOut (tanpa "bulan" yang bukan kolom tabel)
+TX_FIELDS = [f for f in schemas.TransactionOut.model_fields if f != "bulan"]
+TX_COLUMNS = [getattr(models.Transaction, f) for f in TX_FIELDS]
+
+
+def transaction_filters(
+    item_id: Optional[str] = None,
+    category: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    restock_flag: Optional[str] = None,
+):
+    """
+    Filter list / export transaksi. item_id, category dan start-end memakai
+    index Item ID, Category Name dan Tx Date.
+    """
+    tx = models.Transaction
+    filters = []
+    if item_id is not None:
+        filters.append(tx.item_id == item_id)
+    if category is not None:
+        filters.append(tx.category_name == category)
+    if start is not None:
+        filters.append(tx.tx_date >= start)
+    if end is not None:
+        filters.append(tx.tx_date <= end)
+    if restock_flag is not None:
+        filters.append(tx.restock_flag == restock_flag)
+    return filters
+
 
 @router.post(
     "/",
@@ -18,21 +62,284 @@ def create_transaction(
     transaction: schemas.TransactionCreate,
     db: Session = Depends(get_db),
 ):
-    db_transaction = models.Transaction(**transaction.model_dump())
+    # "bulan" hanya field turunan di schema, bukan kolom tabel
+    db_transaction = models.Transaction(**transaction.model_dump(exclude={"bulan"}))
     db.add(db_transaction)
+    db.flush()
+    analytics_summary.record_insert(db, analytics_summary.snapshot(db_transaction))
+    bump_version(db)
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
 
+BULK_CHUNK_SIZE = 5000
+BULK_MAX_CHUNK_SIZE = 10_000
+
+
+async def _bulk_body(request: Request) -> list:
+    """
+    Body bulk: JSON array, atau NDJSON (satu object per baris). Baris NDJSON
+    yang rusak dicatat sebagai ValueError supaya jadi status invalid per baris.
+    """
+    body = await request.body()
+    if body.lstrip()[:1] == b"[":
+        try:
+            return loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body bukan JSON array yang valid")
+
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(loads(line))
+        except ValueError as e:
+            items.append(e)
+    return items
+
+
+def _row_status(row, status, transaction_id=None, detail=None):
+    return {"row": row, "transaction_id": transaction_id, "status": status, "detail": detail}
+
+
+def _validate_bulk(items, result):
+    """Validasi semua baris sekali jalan; baris yang gagal langsung dicatat di result."""
+    valid = []
+    for row, obj in enumerate(items):
+        if isinstance(obj, ValueError):
+            result["rows"].append(_row_status(row, "invalid", detail=f"JSON tidak valid: {obj}"))
+            continue
+        try:
+            valid.append((row, schemas.TransactionCreate.model_validate(obj)))
+        except ValidationError as e:
+            tid = obj.get("transaction_id") if isinstance(obj, dict) else None
+            detail = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err["loc"] else err["msg"]
+                for err in e.errors()
+            )
+            result["rows"].append(_row_status(row, "invalid", None if tid is None else str(tid), detail))
+    return valid
+
+
+TX_COLUMN_NAMES = {attr.key: attr.columns[0].name for attr in models.Transaction.__mapper__.column_attrs}
+
+# tanggal di satu batch sangat berulang, strptime per baris mahal
+_parse_date = lru_cache(maxsize=4096)(parse_date_str)
+
+
+def _tx_values(transaction, exclude_unset=False):
+    # bulk insert tidak lewat @validates, jadi tx_date diisi di sini
+    values = transaction.model_dump(exclude_unset=exclude_unset, exclude={"bulan"})
+    if "date" in values:
+        values["tx_date"] = _parse_date(values["date"]) if values["date"] else None
+    return values
+
+
+def _bulk_chunk(db: Session, chunk, on_duplicate, result):
+    tx = models.Transaction
+
+    # Transaction ID dobel di dalam chunk: skip -> yang belakangan duplicate,
+    # upsert -> yang belakangan menang
+    pending = {}
+    for row, transaction in chunk:
+        previous = pending.get(transaction.transaction_id)
+        if previous is not None:
+            if on_duplicate == "skip":
+                result["rows"].append(_row_status(row, "duplicate", transaction.transaction_id, "dobel di batch"))
+                continue
+            result["rows"].append(_row_status(
+                previous[0], "duplicate", transaction.transaction_id, f"diganti baris {row}"
+            ))
+        pending[transaction.transaction_id] = (row, transaction)
+
+    existing = {
+        t.transaction_id: t
+        for t in db.execute(select(tx).where(tx.transaction_id.in_(list(pending)))).scalars()
+    }
+
+    inserts, updates, changes = [], [], []
+    for tid, (row, transaction) in pending.items():
+        old = existing.get(tid)
+        if old is None:
+            values = _tx_values(transaction)
+            inserts.append(values)
+            changes.append((None, analytics_summary.snapshot(values)))
+        elif on_duplicate == "skip":
+            result["rows"].append(_row_status(row, "duplicate", tid, "sudah ada"))
+        else:
+            # sama seperti PUT: hanya field yang dikirim yang diubah
+            values = _tx_values(transaction, exclude_unset=True)
+            before = analytics_summary.snapshot(old)
+            updates.append(values)
+            changes.append((before, analytics_summary.snapshot({**before, **values})))
+
+    try:
+        if inserts:
+            # Core executemany (tanpa lapisan ORM bulk), key = nama kolom tabel
+            db.execute(insert(tx.__table__), [
+                {TX_COLUMN_NAMES[attr]: value for attr, value in values.items()} for values in inserts
+            ])
+        if updates:
+            db.execute(update(tx), updates)
+        analytics_summary.record_many(db, changes)
+        bump_version(db)
+        db.commit()
+    except IntegrityError:
+        # ID yang sama baru saja di-insert request lain: chunk ini dibatalkan
+        db.rollback()
+        for tid, (row, _) in pending.items():
+            if tid in existing and on_duplicate == "skip":
+                continue
+            result["rows"].append(_row_status(row, "error", tid, "konflik Transaction ID, kirim ulang"))
+        return
+
+    result["inserted"] += len(inserts)
+    result["updated"] += len(updates)
+
+
+@router.post(
+    "/bulk",
+    response_model=schemas.BulkTransactionOut,
+    dependencies=[Depends(require_admin)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TransactionCreate"}},
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+def bulk_create_transactions(
+    items: list = Depends(_bulk_body),
+    on_duplicate: Literal["skip", "upsert"] = "skip",
+    chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=BULK_MAX_CHUNK_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    Insert banyak transaksi sekaligus (JSON array atau NDJSON). Semua baris
+    divalidasi dulu, lalu di-insert per chunk_size baris dengan executemany,
+    satu commit per chunk. Transaction ID yang sudah ada dilewati
+    (on_duplicate=skip) atau di-update (on_duplicate=upsert).
+
+    Response: jumlah per status + daftar baris yang tidak masuk saja
+    (`row` = posisi 0-based di array / baris NDJSON yang tidak kosong).
+    """
+    result = {"received": len(items), "inserted": 0, "updated": 0, "rows": []}
+    valid = _validate_bulk(items, result)
+
+    for start in range(0, len(valid), chunk_size):
+        _bulk_chunk(db, valid[start:start + chunk_size], on_duplicate, result)
+
+    result["rows"].sort(key=lambda r: r["row"])
+    for name in ("duplicate", "invalid", "error"):
+        result[name] = sum(1 for r in result["rows"] if r["status"] == name)
+    return result
+
+
 @router.get(
     "/",
     response_model=list[schemas.TransactionOut],
     response_model_exclude_none=True,   
 )
-def get_all_transactions(db: Session = Depends(get_db)):
-    txs = db.query(models.Transaction).all()
-    return [schemas.TransactionOut.model_validate(tx) for tx in txs]
+def get_all_transactions(
+    response: Response,
+    limit: int = LimitParam,
+    after: Optional[str] = None,
+    filters: list = Depends(transaction_filters),
+    with_total: bool = True,
+    db: Session = Depends(get_db),
+):
+    """
+    List transaksi per halaman (keyset di Transaction ID, lihat pagination.py).
+    Baris diambil sebagai tuple kolom dan langsung di-encode (serialization.py).
+    """
+    query = db.query(*TX_COLUMNS).filter(*filters)
+    rows = paginate(query, models.Transaction.transaction_id, after, limit, response, with_total)
+    return rows_response(rows, TX_FIELDS, response, exclude_none=True)
+
+
+EXPORT_CHUNK_SIZE = 5000
+
+
+def _export_stmt(filters):
+    return (
+        select(*TX_COLUMNS)
+        .where(*filters)
+        .order_by(models.Transaction.transaction_id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+
+def _encode_chunk(rows, fmt):
+    buf = io.StringIO()
+    if fmt == "csv":
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+    else:
+        for row in rows:
+            buf.write(json.dumps(dict(zip(TX_FIELDS, row))))
+            buf.write("\n")
+    return buf.getvalue()
+
+
+def _export_chunks(db: Session, filters, fmt):
+    """
+    Baca pakai server-side cursor (yield_per) dan kirim per chunk, jadi memori
+    tetap datar berapa pun jumlah barisnya dan byte pertama keluar sebelum
+    query selesai dibaca.
+    """
+    if fmt == "csv":
+        yield _encode_chunk([TX_FIELDS], fmt)
+    for rows in db.execute(_export_stmt(filters)).partitions():
+        yield _encode_chunk(rows, fmt)
+
+
+async def _export_chunks_async(db, filters, fmt):
+    if fmt == "csv":
+        yield _encode_chunk([TX_FIELDS], fmt)
+    result = await db.stream(_export_stmt(filters))
+    async for rows in result.partitions():
+        yield _encode_chunk(rows, fmt)
+
+
+def _export_response(chunks, fmt):
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{fmt}"'},
+    )
+
+
+@router.get("/export")
+def export_transactions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    filters: list = Depends(transaction_filters),
+    db: Session = Depends(get_db),
+):
+    """
+    Dump tabel transaction (filter sama dengan GET /transactions/) sebagai
+    stream NDJSON atau CSV. Session get_db baru ditutup setelah stream selesai.
+    """
+    return _export_response(_export_chunks(db, filters, format), format)
+
+
+async def export_transactions_async(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    filters: list = Depends(transaction_filters),
+    db=Depends(get_async_db),  # AsyncSession; tidak di-import supaya mode sync tidak butuh greenlet
+):
+    """Versi async export_transactions (DB_MODE=async), baca lewat AsyncSession.stream."""
+    return _export_response(_export_chunks_async(db, filters, format), format)
+
+
+# stream membaca DB setelah handler selesai -> tidak bisa lewat run_sync (async_routes.py)
+export_transactions.async_endpoint = export_transactions_async
 
 @router.get(
     "/{transaction_id}",
@@ -68,10 +375,14 @@ def update_transaction(
     if tx is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    update_data = transaction.model_dump(exclude_unset=True)
+    before = analytics_summary.snapshot(tx)
+    update_data = transaction.model_dump(exclude_unset=True, exclude={"bulan"})
     for key, value in update_data.items():
         setattr(tx, key, value)
 
+    db.flush()
+    analytics_summary.record_update(db, before, analytics_summary.snapshot(tx))
+    bump_version(db)
     db.commit()
     db.refresh(tx)
     return tx
@@ -93,6 +404,10 @@ def delete_transaction(transaction_id: str, db: Session = Depends(get_db)):
             detail="Transaction not found",
         )
 
+    before = analytics_summary.snapshot(tx)
     db.delete(tx)
+    db.flush()
+    analytics_summary.record_delete(db, before)
+    bump_version(db)
     db.commit()
     return {"status": "success", "message": "Transaction deleted"}
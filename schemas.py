@@ -71,6 +71,24 @@ class TransactionOut(TransactionBase):
     model_config = {"from_attributes": True}
 
 
+class BulkRowStatus(BaseModel):
+    # hanya baris yang tidak masuk (duplicate / invalid / error)
+    row: int
+    transaction_id: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
+
+
+class BulkTransactionOut(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    duplicate: int
+    invalid: int
+    error: int
+    rows: list[BulkRowStatus]
+
+
 class DataUASOut(BaseModel):
     date: str
     item_id: str
@@ -0,0 +1,52 @@
+"""
+Jalur cepat serialisasi untuk endpoint list.
+
+Endpoint memilih kolom sebagai tuple (tanpa object ORM), lalu mengembalikan
+FastJSONResponse langsung. Karena yang dikembalikan sudah Response, FastAPI
+tidak memvalidasi ulang ke response_model, tapi response_model tetap dipakai
+untuk skema OpenAPI. orjson dipakai kalau terpasang, kalau tidak pakai json.
+"""
+import json
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson opsional
+    orjson = None
+
+
+def _default(obj):
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data):
+    """Parse JSON (bytes / str); error parse selalu turunan ValueError."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def rows_response(rows, fields, response: Response = None, exclude_none=False):
+    """
+    Bangun FastJSONResponse dari tuple kolom `rows` dengan nama `fields`.
+    Header yang sudah diset di `response` (mis. dari paginate) ikut dikirim.
+    """
+    if exclude_none:
+        content = [{f: v for f, v in zip(fields, row) if v is not None} for row in rows]
+    else:
+        content = [dict(zip(fields, row)) for row in rows]
+
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, headers=headers)
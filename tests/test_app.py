@@ -0,0 +1,321 @@
+import multiprocessing
+import random
+import shutil
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import crud
+from crud_store import BarangStore
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def barang_csv(tmp_path, monkeypatch):
+    csv_file = tmp_path / "barang.csv"
+    shutil.copy(ROOT / "data" / "barang.csv", csv_file)
+    monkeypatch.setattr(crud, "_store", BarangStore(csv_file))
+    return csv_file
+
+
+# -------------------- crud: concurrent writers --------------------
+def _write_many(csv_file, n_threads, n_per_thread):
+    crud._store = BarangStore(csv_file)
+
+    def worker(t):
+        for i in range(n_per_thread):
+            crud.create_barang_auto({"Item_ID": f"P{t % 3}", "OUT": 1, "Date": "1/1/24"})
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrent_writers_do_not_lose_rows(barang_csv):
+    n_procs, n_threads, n_per_thread = 4, 4, 25
+    before = len(crud.get_all_barang())
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_write_many, args=(barang_csv, n_threads, n_per_thread))
+        for _ in range(n_procs)
+    ]
+    for p in procs:
+        p.start()
+    _write_many(barang_csv, n_threads, n_per_thread)
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    # baca dari store baru supaya benar-benar dari disk
+    rows = BarangStore(barang_csv).records()
+    expected = (n_procs + 1) * n_threads * n_per_thread
+    assert len(rows) - before == expected
+    assert len({r["Transaction_ID"] for r in rows}) == len(rows)
+
+    # rantai stok per item tetap utuh: Stock_Awal = Current_Stock baris sebelumnya
+    for item_id in ("P0", "P1", "P2"):
+        item_rows = [r for r in rows if r["Item_ID"] == item_id]
+        for prev, row in zip(item_rows, item_rows[1:]):
+            assert row["Stock_Awal"] == prev["Current_Stock"]
+
+
+
+# -------------------- crud: batch sama dengan satu-satu --------------------
+def test_batch_matches_single_inserts_on_hot_item(barang_csv, monkeypatch, tmp_path):
+    rng = random.Random(0)
+    start = date(2024, 2, 1)
+    # satu item panas, OUT besar -> restock hampir tiap dua event; 3 event per tanggal
+    events = [
+        {"Item_ID": "MK-H", "OUT": rng.randint(0, 600), "Date": (start + timedelta(days=i // 3)).strftime("%m/%d/%y")}
+        for i in range(3000)
+    ]
+    single = [crud.create_barang_auto(e) for e in events]
+
+    batch_csv = tmp_path / "batch" / "barang.csv"
+    batch_csv.parent.mkdir()
+    shutil.copy(ROOT / "data" / "barang.csv", batch_csv)
+    monkeypatch.setattr(crud, "_store", BarangStore(batch_csv))
+    batch = crud.create_barang_batch(events)
+
+    def strip_id(row):
+        return {k: v for k, v in row.items() if k != "Transaction_ID"}
+
+    assert [strip_id(r) for r in batch] == [strip_id(r) for r in single]
+
+
+def test_update_repairs_item_tail(barang_csv):
+    rng = random.Random(1)
+    events = [
+        {"Item_ID": "MK-H", "OUT": rng.randint(0, 600), "Date": "02/01/24"}
+        for _ in range(200)
+    ]
+    rows = crud.create_barang_batch(events)
+
+    before = crud._store.item_rows("MK-H")[-200:]
+    row, repaired = crud.update_transaction_repaired(rows[0]["Transaction_ID"], {"OUT": 0})
+    after = crud._store.item_rows("MK-H")[-200:]
+
+    assert row["OUT"] == 0
+    # jumlah yang dilaporkan = baris setelahnya yang benar-benar berubah
+    assert repaired == sum(a != b for a, b in zip(before[1:], after[1:]))
+    assert repaired > 0
+    assert crud.repair_ledger(rows[0]["Transaction_ID"]) == 0
+    assert crud.update_transaction_repaired("TXR-TIDAK-ADA", {"OUT": 1}) == (None, 0)
+    assert crud.update_transaction("TXR-TIDAK-ADA", {"OUT": 1}) is None
+    assert crud.update_transaction(rows[1]["Transaction_ID"], {"OUT": 1})["OUT"] == 1
+
+
+# -------------------- crud: delete (tombstone) --------------------
+def test_delete_keeps_indexes_and_survives_reload(barang_csv, monkeypatch):
+    import crud_store
+
+    monkeypatch.setattr(crud_store, "MAX_TOMBSTONES", 4)
+    rows = crud.create_barang_batch(
+        [{"Item_ID": f"DEL-{i % 2}", "OUT": 1, "Date": "02/01/24"} for i in range(10)]
+    )
+    before = crud.get_all_barang()
+    victims = [r["Transaction_ID"] for r in rows[::3]]  # 4 baris -> satu kali drop fisik
+    victims.append(before[0]["Transaction_ID"])
+    for txr in victims:
+        assert crud.delete_transaction(txr)
+    assert not crud.delete_transaction(victims[0])
+
+    expected = [r for r in before if r["Transaction_ID"] not in victims]
+    for store in (crud._store, BarangStore(barang_csv)):
+        assert store.records() == expected
+        assert store.find_last("Transaction_ID", victims[-1]) is None
+        assert [r["Transaction_ID"] for r in store.item_rows("DEL-1")] == [
+            r["Transaction_ID"] for r in expected if r["Item_ID"] == "DEL-1"
+        ]
+
+
+# -------------------- backend analytics: jumlah query --------------------
+@pytest.fixture
+def analytics_client():
+    from datetime import date
+
+    from backend.auth import get_current_user
+    from backend.db import Base, get_db
+    from backend.models import Category, Item, Transaction
+    from backend.routers import analytics
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        db.add(Category(id=1, name="serum"))
+        for i in range(1, 6):
+            db.add(Item(id=i, item_code=f"IT-{i}", name=f"Item {i}", category_id=1, target_stock=500))
+        for i in range(1, 5):
+            for month in range(1, 4):
+                db.add(Transaction(item_id=i, date=date(2024, month, 10), qty_in=100, qty_out=30 * month))
+        db.commit()
+
+    def override_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(analytics.router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: None
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    return TestClient(app), queries
+
+
+@pytest.mark.parametrize(
+    "path", ["frequency", "avg_restock_time", "out_trend", "turnover_ratio", "predicted_restock"]
+)
+def test_analytics_endpoint_runs_one_query(analytics_client, path):
+    client, queries = analytics_client
+    response = client.get(f"/analytics/{path}")
+
+    assert response.status_code == 200
+    assert len(queries) == 1
+
+
+def test_analytics_aggregates(analytics_client):
+    client, _ = analytics_client
+
+    assert client.get("/analytics/frequency").json()[0] == {"item_id": 1, "transaction_count": 3}
+    assert client.get("/analytics/avg_restock_time").json()[0] == {"item_id": 1, "avg_restock_days": 30}
+    assert client.get("/analytics/out_trend").json()[:2] == [
+        {"item_id": 1, "month": "2024-01", "qty_out": 30},
+        {"item_id": 1, "month": "2024-02", "qty_out": 60},
+    ]
+    # item 5 tanpa transaksi tetap muncul
+    assert client.get("/analytics/turnover_ratio").json()[-2:] == [
+        {"item_id": 4, "turnover_ratio": 0.6},
+        {"item_id": 5, "turnover_ratio": None},
+    ]
+    assert client.get("/analytics/predicted_restock").json()[0] == {"item_id": 1, "predicted_restock": 380}
+
+
+# -------------------- backend transactions: OUT paralel --------------------
+def _stock_client(tmp_path, stock):
+    from backend.auth import get_current_user
+    from backend.db import Base, get_db
+    from backend.models import Category, Item
+    from backend.routers import transactions
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'stock.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        db.add(Category(id=1, name="serum"))
+        db.add(Item(id=1, item_code="IT-1", name="Item 1", category_id=1, target_stock=500, stock=stock))
+        db.commit()
+
+    def override_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(transactions.router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: None
+    return TestClient(app), SessionLocal
+
+
+def test_parallel_out_requests_keep_stock_exact(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from backend.models import Item, Transaction
+
+    client, SessionLocal = _stock_client(tmp_path, 100)
+
+    def out(_):
+        return client.post("/transactions/", json={"item_id": 1, "date": "2024-01-01", "qty_out": 2})
+
+    # 60 x OUT 2 untuk stok 100: tepat 50 berhasil, sisanya ditolak
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        responses = list(pool.map(out, range(60)))
+
+    ok = [r.json() for r in responses if r.status_code == 200]
+    assert len(ok) == 50
+    assert all(r.status_code == 400 for r in responses if r.status_code != 200)
+    assert sorted(t["stock_after"] for t in ok) == list(range(0, 100, 2))
+    assert all(t["stock_before"] - t["stock_after"] == 2 for t in ok)
+
+    with SessionLocal() as db:
+        assert db.get(Item, 1).stock == 0
+        assert db.query(Transaction).count() == 50
+
+    assert client.post("/transactions/", json={"item_id": 99, "date": "2024-01-01", "qty_in": 1}).status_code == 404
+
+
+# -------------------- backend auth: invalidasi token cache --------------------
+def test_token_cache_invalidated_after_commit_only():
+    from backend.auth import token_cache
+    from backend.db import Base
+    from backend.models import User
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(id=1, username="admin", password="x"))
+        db.commit()
+
+    def cache_user():
+        token_cache.put("digest-1", float("inf"), {"id": 1, "username": "admin"})
+
+    cache_user()
+    with SessionLocal() as db:
+        db.get(User, 1).password = "y"
+        db.flush()
+        # belum commit: request lain masih boleh memakai cache lama
+        assert token_cache.get("digest-1") is not None
+        db.rollback()
+    assert token_cache.get("digest-1") is not None
+
+    with SessionLocal() as db:
+        db.get(User, 1).password = "z"
+        db.flush()
+        db.commit()
+    assert token_cache.get("digest-1") is None
+
+    cache_user()
+    with SessionLocal() as db:
+        db.query(User).update({"password": "w"})
+        assert token_cache.get("digest-1") is not None
+        db.commit()
+    assert token_cache.get("digest-1") is None
+
+
+def test_negative_quantities_do_not_change_stock(tmp_path):
+    from backend.models import Item
+
+    client, SessionLocal = _stock_client(tmp_path, 10)
+
+    def post(**qty):
+        return client.post("/transactions/", json={"item_id": 1, "date": "2024-01-01", **qty})
+
+    # qty negatif diabaikan, bukan dibalik arahnya
+    assert post(qty_out=-50).json()["stock_after"] == 10
+    assert post(qty_in=-50).json()["stock_after"] == 10
+    assert post(qty_in=-5, qty_out=11).status_code == 400
+    assert post(qty_in=5, qty_out=-3).json()["stock_after"] == 15
+
+    with SessionLocal() as db:
+        assert db.get(Item, 1).stock == 15
@@ -0,0 +1,88 @@
+import random
+import threading
+
+
+class IdSpaceExhausted(Exception):
+    pass
+
+
+class TxrAllocator:
+    """
+    Alokasi Transaction_ID format TXR###### tanpa tabrakan.
+
+    Set ID yang sudah terpakai disimpan antar pemanggilan (tidak dibangun
+    ulang dari tabel setiap insert). Begitu ruang ID terisi lebih dari
+    `max_fill`, alokasi langsung gagal dengan IdSpaceExhausted, atau kalau
+    `widen=True` jumlah digitnya ditambah satu (TXR####### dst).
+    """
+
+    def __init__(self, prefix="TXR", digits=6, max_fill=0.9, widen=False):
+        self.prefix = prefix
+        self.digits = digits
+        self.max_fill = max_fill
+        self.widen = widen
+        self._used = set()
+        self._in_space = 0
+        self._lock = threading.Lock()
+
+    # -------------------- Ruang ID --------------------
+    def _bounds(self):
+        # format lama: random.randint(100000, 999999) untuk 6 digit
+        return 10 ** (self.digits - 1), 10 ** self.digits - 1
+
+    def _capacity(self):
+        low, high = self._bounds()
+        return high - low + 1
+
+    def _in_current_space(self, txr):
+        if not isinstance(txr, str) or not txr.startswith(self.prefix):
+            return False
+        number = txr[len(self.prefix):]
+        if len(number) != self.digits or not number.isdigit():
+            return False
+        low, high = self._bounds()
+        return low <= int(number) <= high
+
+    def _count_in_space(self):
+        return sum(1 for txr in self._used if self._in_current_space(txr))
+
+    def _ensure_space(self, n):
+        while self._in_space + n > self._capacity() * self.max_fill:
+            if not self.widen:
+                raise IdSpaceExhausted(
+                    f"Ruang ID {self.prefix}{'#' * self.digits} hampir penuh "
+                    f"({self._in_space}/{self._capacity()} terpakai, minta {n} lagi)"
+                )
+            self.digits += 1
+            self._in_space = self._count_in_space()
+
+    # -------------------- Public --------------------
+    def seed(self, ids):
+        """Ganti set ID terpakai (dipanggil setiap tabel di-load ulang)."""
+        with self._lock:
+            self._used = {txr for txr in ids if isinstance(txr, str)}
+            self._in_space = self._count_in_space()
+
+    def add(self, txr):
+        with self._lock:
+            if isinstance(txr, str) and txr not in self._used:
+                self._used.add(txr)
+                if self._in_current_space(txr):
+                    self._in_space += 1
+
+    def reserve(self, n):
+        """Ambil n ID baru sekaligus (untuk batch insert)."""
+        with self._lock:
+            self._ensure_space(n)
+            low, high = self._bounds()
+            reserved = []
+            while len(reserved) < n:
+                txr = f"{self.prefix}{random.randint(low, high)}"
+                if txr not in self._used:
+                    self._used.add(txr)
+                    reserved.append(txr)
+            self._in_space += n
+            return reserved
+
+    def allocate(self):
+        return self.reserve(1)[0]